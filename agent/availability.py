@@ -0,0 +1,208 @@
+import math
+import re
+import threading
+from datetime import date as Date
+
+SLOT_MINUTES = 30
+DINING_MINUTES = 90
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DINING_SLOTS = math.ceil(DINING_MINUTES / SLOT_MINUTES)
+
+_TIME_RE = re.compile(r"^(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?$")
+_DATE_RE = re.compile(r"^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})$|^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})$")
+
+
+def parse_date(text):
+    """Accept dd-mm-yyyy (also / or . separated) and yyyy-mm-dd; return a date or None."""
+    if not isinstance(text, str):
+        return None
+    match = _DATE_RE.match(text.strip())
+    if not match:
+        return None
+    if match.group(1):
+        day, month, year = match.group(1), match.group(2), match.group(3)
+    else:
+        year, month, day = match.group(4), match.group(5), match.group(6)
+    try:
+        return Date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def parse_time(text):
+    if not isinstance(text, str):
+        return None
+    match = _TIME_RE.match(text.lower().strip())
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridiem = match.group(3)
+
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif match.group(2) is None:
+        return None
+
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def format_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def iso_date(text):
+    parsed = parse_date(text)
+    return parsed.isoformat() if parsed else None
+
+
+def display_date(text):
+    parsed = parse_date(text)
+    return parsed.strftime("%d-%m-%Y") if parsed else text
+
+
+def normalize_reservation(record):
+    """Return (record with ISO date, HH:MM time and minute-of-day, problem or None)."""
+    day = iso_date(record.get("date"))
+    minutes = record.get("minute")
+    if not isinstance(minutes, int):
+        minutes = parse_time(record.get("time"))
+    if day is None:
+        return record, f"unparseable date {record.get('date')!r}"
+    if minutes is None:
+        return record, f"unparseable time {record.get('time')!r}"
+    return {**record, "date": day, "time": format_time(minutes), "minute": minutes}, None
+
+
+def seats_per_table(restaurant):
+    tables = max(restaurant["available_tables"], 1)
+    return max(2, math.ceil(restaurant["seating_capacity"] / tables))
+
+
+def tables_needed(restaurant, guests):
+    guests = max(int(guests or 1), 1)
+    return math.ceil(guests / seats_per_table(restaurant))
+
+
+def _dining_slots(minutes):
+    start = minutes // SLOT_MINUTES
+    return range(start, min(start + DINING_SLOTS, SLOTS_PER_DAY))
+
+
+def build_bucket(restaurant, reservations):
+    """Tables booked per slot of one day, from that day's reservations."""
+    bucket = [0] * SLOTS_PER_DAY
+    for r in reservations:
+        minutes = r.get("minute")
+        if minutes is None:
+            continue
+        needed = tables_needed(restaurant, r.get("guests"))
+        for slot in _dining_slots(minutes):
+            bucket[slot] += needed
+    return bucket
+
+
+def overlap_window(minutes):
+    """[start, end) of the start minutes whose dining time overlaps a booking at `minutes`."""
+    first = minutes // SLOT_MINUTES - DINING_SLOTS + 1
+    return max(first, 0) * SLOT_MINUTES, (minutes // SLOT_MINUTES + DINING_SLOTS) * SLOT_MINUTES
+
+
+def fits(restaurant, reservations, minutes, guests):
+    """Whether a booking still fits next to `reservations` (the rows in its overlap window)."""
+    bucket = build_bucket(restaurant, reservations)
+    needed = tables_needed(restaurant, guests)
+    return all(bucket[slot] + needed <= restaurant["available_tables"] for slot in _dining_slots(minutes))
+
+
+class AvailabilityEngine:
+    """Read cache of booked-table counts per restaurant, per ISO date, per SLOT_MINUTES slot.
+
+    A bucket is loaded from the store the first time a (restaurant, date) pair
+    is read. Bookings are never decided here: the store re-checks capacity
+    inside its own write transaction (ReservationStore.book/rebook), and the
+    tools drop the affected bucket after every write. Stores shared between
+    processes expose a changes_token(); when it moves, every bucket is dropped.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._buckets = {}
+        self._token = None
+        self.lock = threading.RLock()
+
+    def _sync(self):
+        token = self.store.changes_token()
+        if token != self._token:
+            self._buckets.clear()
+            self._token = token
+
+    def _bucket(self, restaurant, date):
+        key = (restaurant["id"], date)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = build_bucket(restaurant, self.store.find_slot(restaurant["id"], date))
+            self._buckets[key] = bucket
+        return bucket
+
+    def prime(self, restaurants, date):
+        # One store query for every bucket that is not loaded yet.
+        with self.lock:
+            self._sync()
+            missing = [r for r in restaurants if (r["id"], date) not in self._buckets]
+            if not missing:
+                return
+            by_restaurant = {}
+            for row in self.store.find_date(date, [r["id"] for r in missing]):
+                by_restaurant.setdefault(row["restaurant_id"], []).append(row)
+            for r in missing:
+                self._buckets[(r["id"], date)] = build_bucket(r, by_restaurant.get(r["id"], []))
+
+    @staticmethod
+    def _left(restaurant, bucket, minutes):
+        booked = max(bucket[slot] for slot in _dining_slots(minutes))
+        return max(restaurant["available_tables"] - booked, 0)
+
+    def tables_left(self, restaurant, date, minutes):
+        with self.lock:
+            self._sync()
+            return self._left(restaurant, self._bucket(restaurant, date), minutes)
+
+    def tables_left_many(self, restaurants, date, minutes_list):
+        """{restaurant id: [tables left per time]} from one consistent view."""
+        with self.lock:
+            self.prime(restaurants, date)
+            return {
+                r["id"]: [self._left(r, self._buckets[(r["id"], date)], m) for m in minutes_list]
+                for r in restaurants
+            }
+
+    def is_available(self, restaurant, date, minutes, guests=None):
+        return self.tables_left(restaurant, date, minutes) >= tables_needed(restaurant, guests)
+
+    def invalidate(self, restaurant_id=None, date=None):
+        with self.lock:
+            if restaurant_id is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop((restaurant_id, date), None)
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(store):
+    engine = _engines.get(id(store))
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(id(store))
+            if engine is None:
+                engine = AvailabilityEngine(store)
+                _engines[id(store)] = engine
+    return engine
@@ -0,0 +1,236 @@
+import os
+import re
+import time
+
+from agent.entities import extract_entities
+from agent.router import execute_tool_async
+
+BOOKING_SLOTS = ["restaurant_id", "user_name", "phone_number", "date", "time", "guests"]
+
+SLOT_DESCRIPTIONS = {
+    "user_name": "full name",
+    "phone_number": "phone number with country code",
+    "date": "booking date in DD-MM-YYYY format",
+    "time": "preferred time",
+    "guests": "number of guests"
+}
+
+SLOT_QUESTIONS = {
+    "user_name": "What's your full name?",
+    "phone_number": "What's your phone number with country code?",
+    "date": "What date would you like? (DD-MM-YYYY format)",
+    "time": "What time would you prefer?",
+    "guests": "How many guests will be joining?"
+}
+
+YES_RE = re.compile(r"^\s*(yes|yeah|yep|yup|sure|confirm|ok|okay|go ahead|please do|book it|do it)\b", re.IGNORECASE)
+NO_RE = re.compile(r"^\s*(no|nope|nah|cancel|don't|do not|stop|never mind)\b", re.IGNORECASE)
+NAME_RE = re.compile(r"^[A-Za-z][A-Za-z .'-]{0,60}$")
+NAME_LEAD_IN_RE = re.compile(
+    r"^\s*(my name is|my name's|name is|name\s*:|i am|i'm|im|this is|it's|it is|call me)\s+",
+    re.IGNORECASE
+)
+BARE_NUMBER_RE = re.compile(r"^\s*(\d{1,3})\s*$")
+ABANDON_RE = re.compile(
+    r"^\s*(never ?mind|forget (it|about it)|stop|(cancel|drop|abort) (the|this|my) booking|don't book)\b",
+    re.IGNORECASE
+)
+# Words that make a short letters-only message a question or a sentence, not a name.
+NOT_NAME_WORDS = {
+    "what", "when", "where", "which", "who", "whom", "whose", "why", "how",
+    "is", "are", "am", "was", "do", "does", "did", "can", "could", "would", "should",
+    "i", "you", "your", "my", "me", "we", "our", "it", "its", "this", "that", "there",
+    "the", "and", "or", "of", "for", "to", "with", "at", "in", "on", "about",
+    "hi", "hello", "hey", "thanks", "thank", "yes", "no", "ok", "okay", "please", "sure",
+    "book", "booking", "table", "reservation", "restaurant", "open", "opening", "hours",
+    "menu", "time", "date", "guests", "people", "cancel", "change", "show", "find", "tell",
+    "good", "fine", "great", "here", "ready", "back", "sorry", "looking", "not", "just"
+}
+# A booking nobody touched for this long is dropped instead of capturing unrelated turns.
+BOOKING_STATE_TTL = float(os.getenv("BOOKING_STATE_TTL", "1800"))
+
+
+def name_from_message(text):
+    """The name in "My name is John Smith." style answers, or None if it is not one."""
+    candidate = NAME_LEAD_IN_RE.sub("", text.strip()).strip(" .,!")
+    return candidate if looks_like_name(candidate) else None
+
+
+def looks_like_name(text):
+    words = text.lower().replace(".", " ").split()
+    return (
+        bool(NAME_RE.match(text))
+        and len(words) <= 5
+        and not NOT_NAME_WORDS.intersection(words)
+    )
+
+
+class BookingState:
+    """Slots collected for the booking in progress in one chat session."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.active = False
+        self.restaurant_name = None
+        self.slots = {}
+        self.awaiting = None
+        self.updated_at = None
+
+    def expired(self, now=None):
+        if not self.active or self.updated_at is None or not BOOKING_STATE_TTL:
+            return False
+        return (now or time.time()) - self.updated_at > BOOKING_STATE_TTL
+
+    def missing(self):
+        return [slot for slot in BOOKING_SLOTS if slot not in self.slots]
+
+    def start(self, restaurant):
+        self.reset()
+        self.active = True
+        self.restaurant_name = restaurant["name"]
+        self.slots["restaurant_id"] = restaurant["id"]
+        self.awaiting = "user_name"
+        self.updated_at = time.time()
+
+    def update_from_tool(self, name, output):
+        if not isinstance(output, dict):
+            return
+        if name == "find_restaurant_by_name" and output.get("success"):
+            self.start(output["restaurant"])
+        elif name == "create_reservation" and output.get("success"):
+            self.reset()
+
+    def update_from_message(self, text):
+        if not self.active:
+            return []
+
+        filled = []
+        entities = extract_entities(text)
+
+        name = name_from_message(text)
+        if self.awaiting == "user_name" and name and not entities["cuisines"] and not entities["restaurants"]:
+            self.slots["user_name"] = name
+            filled.append("user_name")
+        if entities["phone_numbers"]:
+            self.slots["phone_number"] = entities["phone_numbers"][-1]
+            filled.append("phone_number")
+        if entities["dates"]:
+            self.slots["date"] = entities["dates"][-1]
+            filled.append("date")
+        if entities["times"]:
+            self.slots["time"] = entities["times"][-1]
+            filled.append("time")
+
+        guests = entities["guests"]
+        if guests is None and self.awaiting == "guests":
+            bare = BARE_NUMBER_RE.match(text)
+            guests = int(bare.group(1)) if bare else None
+        if guests:
+            self.slots["guests"] = guests
+            filled.append("guests")
+        if filled:
+            self.updated_at = time.time()
+        return filled
+
+    def summary(self):
+        return (
+            f"Restaurant: {self.restaurant_name} (ID: {self.slots['restaurant_id']})\n"
+            f"Name: {self.slots['user_name']}\n"
+            f"Phone: {self.slots['phone_number']}\n"
+            f"Date: {self.slots['date']}\n"
+            f"Time: {self.slots['time']}\n"
+            f"Guests: {self.slots['guests']}"
+        )
+
+    def to_dict(self):
+        return {
+            "active": self.active,
+            "restaurant_name": self.restaurant_name,
+            "slots": dict(self.slots),
+            "awaiting": self.awaiting,
+            "updated_at": self.updated_at
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        if data:
+            state.active = data.get("active", False)
+            state.restaurant_name = data.get("restaurant_name")
+            state.slots = dict(data.get("slots") or {})
+            state.awaiting = data.get("awaiting")
+            state.updated_at = data.get("updated_at")
+        return state
+
+
+async def booking_reply(state, user_input, ask_for_slot, format_output):
+    """Advance the booking by one user message.
+
+    Returns None when the message is not part of the booking flow, so the
+    caller can hand it to the full agent instead.
+    """
+    if not state.active:
+        return None
+    if state.expired():
+        state.reset()
+        return None
+    if ABANDON_RE.match(user_input):
+        state.reset()
+        return "Okay, I've dropped that booking. Let me know if there's anything else I can help with."
+
+    filled = state.update_from_message(user_input)
+
+    if state.awaiting == "confirm" and not filled and not state.missing():
+        if YES_RE.match(user_input):
+            return await _create(state, format_output)
+        if NO_RE.match(user_input):
+            state.reset()
+            return "Okay, I haven't booked anything. Let me know if you'd like to change the details or pick another restaurant."
+
+    if not filled:
+        return None
+
+    missing = state.missing()
+    if missing:
+        state.awaiting = missing[0]
+        return await ask_for_slot(state, missing[0])
+
+    availability = await execute_tool_async("check_availability", {
+        "restaurant_id": state.slots["restaurant_id"],
+        "date": state.slots["date"],
+        "time": state.slots["time"],
+        "guests": state.slots["guests"]
+    })
+    if availability.get("error"):
+        bad_slot = "date" if "date" in availability["error"].lower() else "time"
+        state.slots.pop(bad_slot, None)
+        state.awaiting = bad_slot
+        return f"{availability['error']}. {SLOT_QUESTIONS[bad_slot]}"
+    if not availability.get("available"):
+        state.slots.pop("time", None)
+        state.awaiting = "time"
+        return "❌ No table available at that time. What other time would work for you?"
+
+    state.awaiting = "confirm"
+    return f"✔ A table is available.\n\n{state.summary()}\n\nShould I confirm the booking?"
+
+
+async def _create(state, format_output):
+    output = await execute_tool_async("create_reservation", {
+        "user_name": state.slots["user_name"],
+        "restaurant_id": state.slots["restaurant_id"],
+        "date": state.slots["date"],
+        "time": state.slots["time"],
+        "guests": state.slots["guests"],
+        "phone_number": state.slots["phone_number"]
+    })
+    reply = format_output("create_reservation", output)
+    if output.get("success"):
+        state.reset()
+        return reply
+
+    state.slots.pop("time", None)
+    state.awaiting = "time"
+    return f"{reply} {SLOT_QUESTIONS['time']}"
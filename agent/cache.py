@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.history import SUMMARY_PREFIX
+
+PERSONAL_DATA_RE = re.compile(
+    r"\+?\d[\d\s().-]{7,}\d"                # phone numbers
+    r"|[\w.+-]+@[\w-]+\.[\w.-]+"            # email addresses
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def schema_digest(tool_schema):
+    return hashlib.sha256(json.dumps(tool_schema, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _normalize_message(message):
+    normalized = {"role": message.get("role")}
+    content = message.get("content")
+    if isinstance(content, str):
+        content = _WHITESPACE_RE.sub(" ", content).strip()
+        if message.get("role") == "user":
+            content = content.lower()
+    normalized["content"] = content
+    if message.get("tool_calls"):
+        normalized["tool_calls"] = [
+            (tc["function"]["name"], tc["function"]["arguments"]) for tc in message["tool_calls"]
+        ]
+    return normalized
+
+
+def cache_key(messages, model, tool_schema):
+    payload = json.dumps({
+        "model": model,
+        "tools": schema_digest(tool_schema),
+        "messages": [_normalize_message(m) for m in messages]
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_cacheable(messages):
+    for message in messages:
+        # Tool results describe live availability and bookings; never replay them.
+        if message.get("role") == "tool":
+            return False
+        content = message.get("content")
+        if not isinstance(content, str):
+            continue
+        if message.get("role") == "system":
+            # Our own prompts (which quote example phone numbers) are fine; the
+            # windowed-history summary carries the guest's collected details.
+            if content.startswith(SUMMARY_PREFIX):
+                return False
+        elif PERSONAL_DATA_RE.search(content):
+            # User and assistant alike: confirmations echo details back ("Phone: +91-...").
+            return False
+    return True
+
+
+class ResponseCache:
+    """LRU of LLM responses in memory, optionally backed by SQLite on disk.
+
+    Disk reads and writes run on one dedicated thread, so the event loop
+    never waits on SQLite: async callers use aget(), and set() only queues
+    the write. Expired disk rows are pruned on open and then at most once
+    per PRUNE_INTERVAL, not on every write.
+    """
+
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, max_entries=512, ttl_seconds=300, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "evictions": 0}
+        self._disk_executor = None
+        self._conn = None
+        self._next_prune = 0.0
+        if disk_path:
+            self._disk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+            self._disk_executor.submit(self._open_disk).result()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    # -- disk, only ever called on the cache's own thread ------------------
+
+    def _open_disk(self):
+        self._conn = sqlite3.connect(self.disk_path, timeout=5)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+        self._prune()
+
+    def _prune(self):
+        now = time.time()
+        with self._conn:
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._next_prune = now + self.PRUNE_INTERVAL
+
+    def _disk_get(self, key):
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row and row[1] > time.time():
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self._count("disk_hits")
+            return value
+        return None
+
+    def _disk_set(self, key, value, expires_at):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+        if time.time() >= self._next_prune:
+            self._prune()
+
+    def _disk_clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    # ----------------------------------------------------------------------
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def bypass(self):
+        self._count("bypassed")
+
+    def _memory_get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._entries[key]
+        return None
+
+    def get(self, key):
+        """Blocking lookup for sync callers; async code uses aget()."""
+        value = self._memory_get(key)
+        if value is None and self.disk_path:
+            value = self._disk_executor.submit(self._disk_get, key).result()
+        if value is None:
+            self._count("misses")
+        return value
+
+    async def aget(self, key):
+        value = self._memory_get(key)
+        if value is None and self.disk_path:
+            loop = asyncio.get_running_loop()
+            value = await loop.run_in_executor(self._disk_executor, self._disk_get, key)
+        if value is None:
+            self._count("misses")
+        return value
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self.disk_path:
+            # Write-behind: the caller (usually the event loop) does not wait for SQLite.
+            self._disk_executor.submit(self._disk_set, key, value, expires_at)
+
+    def flush(self):
+        """Wait for queued disk writes."""
+        if self.disk_path:
+            self._disk_executor.submit(lambda: None).result()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path:
+            self._disk_executor.submit(self._disk_clear).result()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from agent.names import NameIndex
+
+TOP_N = 5
+# Matching index keys per (index, query); queries come from users, so the cache is an LRU.
+KEY_CACHE_SIZE = 1024
+
+
+def _norm(text):
+    return text.lower().strip() if text else ""
+
+
+class RestaurantCatalog:
+
+    def __init__(self, restaurants):
+        self.restaurants = restaurants
+        self.by_id = {}
+        self.cuisine_index = {}
+        self.location_index = {}
+        self._summaries = []
+        self._key_cache = OrderedDict()
+        self._key_cache_lock = threading.Lock()
+        self._name_index = None
+        self._name_index_lock = threading.Lock()
+
+        for pos, r in enumerate(restaurants):
+            self.by_id[r["id"]] = r
+            self.cuisine_index.setdefault(_norm(r["cuisine"]), []).append(pos)
+            self.location_index.setdefault(_norm(r["location"]), []).append(pos)
+            self._summaries.append({
+                "id": r["id"],
+                "name": r["name"],
+                "cuisine": r["cuisine"],
+                "rating": r["rating"],
+                "location": r["location"],
+                "available_tables": r["available_tables"]
+            })
+
+        by_capacity = sorted(range(len(restaurants)), key=lambda p: restaurants[p]["seating_capacity"])
+        self._capacity_positions = by_capacity
+        self._capacities = [restaurants[p]["seating_capacity"] for p in by_capacity]
+
+        # Rating-ordered rows per cuisine; recommend() walks these until it has TOP_N hits.
+        self.ranked_by_cuisine = {}
+        for key, positions in self.cuisine_index.items():
+            ranked = [p for p in positions if restaurants[p]["available_tables"] > 0]
+            ranked.sort(key=lambda p: restaurants[p]["rating"], reverse=True)
+            self.ranked_by_cuisine[key] = ranked
+
+    def _matching_keys(self, index_name, index, query):
+        cache_key = (index_name, query)
+        with self._key_cache_lock:
+            keys = self._key_cache.get(cache_key)
+            if keys is not None:
+                self._key_cache.move_to_end(cache_key)
+                return keys
+        keys = [k for k in index if query in k]
+        with self._key_cache_lock:
+            self._key_cache[cache_key] = keys
+            while len(self._key_cache) > KEY_CACHE_SIZE:
+                self._key_cache.popitem(last=False)
+        return keys
+
+    def _positions_for(self, index_name, index, query):
+        keys = self._matching_keys(index_name, index, query)
+        if len(keys) == 1:
+            return index[keys[0]]
+        positions = []
+        for key in keys:
+            positions.extend(index[key])
+        return positions
+
+    def _positions_with_capacity(self, guests):
+        start = bisect_left(self._capacities, guests)
+        return self._capacity_positions[start:]
+
+    def search(self, cuisine=None, location=None, guests=None):
+        cuisine = _norm(cuisine)
+        location = _norm(location)
+
+        candidates = []
+        if cuisine:
+            candidates.append(self._positions_for("cuisine", self.cuisine_index, cuisine))
+        if location:
+            candidates.append(self._positions_for("location", self.location_index, location))
+        if guests:
+            candidates.append(self._positions_with_capacity(guests))
+
+        if not candidates:
+            positions = range(len(self.restaurants))
+        else:
+            candidates.sort(key=len)
+            selected = set(candidates[0])
+            for other in candidates[1:]:
+                if not selected:
+                    break
+                selected.intersection_update(other)
+            positions = sorted(selected)
+
+        return [dict(self._summaries[p]) for p in positions]
+
+    def recommend(self, cuisine, guests, limit=TOP_N):
+        results = []
+        for p in self.ranked_by_cuisine.get(_norm(cuisine), []):
+            r = self.restaurants[p]
+            if r["seating_capacity"] >= guests:
+                results.append(dict(r))
+                if len(results) == limit:
+                    break
+        return results
+
+    @property
+    def name_index(self):
+        # Built on first name lookup so catalogs only used for search stay cheap to load.
+        if self._name_index is None:
+            with self._name_index_lock:
+                if self._name_index is None:
+                    self._name_index = NameIndex([r["name"] for r in self.restaurants])
+        return self._name_index
+
+    def find_by_name(self, query, limit=TOP_N):
+        return [(self.restaurants[pos], score) for pos, score in self.name_index.lookup(query, limit)]
+
+    def get(self, restaurant_id):
+        return self.by_id.get(restaurant_id)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def get_catalog(path):
+    mtime = _file_mtime(path)
+    cached = _catalogs.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _catalogs_lock:
+        cached = _catalogs.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        restaurants = []
+        if mtime is not None:
+            with open(path, "r") as f:
+                restaurants = json.load(f)
+
+        catalog = RestaurantCatalog(restaurants)
+        _catalogs[path] = (mtime, catalog)
+        return catalog
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from groq import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncGroq,
+    InternalServerError,
+    RateLimitError
+)
+
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """Chat completions over one pooled HTTP client, with retries and hedging.
+
+    Retries 429, 5xx and connection errors with jittered exponential backoff
+    (honouring Retry-After). When hedging is on and a request has been
+    outstanding longer than the recent p95 of requests like it (same model,
+    streamed or not), a second identical request is started and whichever
+    answers first wins.
+    """
+
+    def __init__(self, api_key=None, base_url=None, connect_timeout=None, read_timeout=None,
+                 pool_size=None, keepalive=None, max_retries=None, backoff_base=None,
+                 backoff_cap=None, hedge=None, hedge_min_samples=20):
+        connect_timeout = _env_float("LLM_CONNECT_TIMEOUT", "5") if connect_timeout is None else connect_timeout
+        read_timeout = _env_float("LLM_READ_TIMEOUT", "30") if read_timeout is None else read_timeout
+        pool_size = int(os.getenv("LLM_POOL_SIZE", "100")) if pool_size is None else pool_size
+        keepalive = int(os.getenv("LLM_KEEPALIVE", "20")) if keepalive is None else keepalive
+
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "3")) if max_retries is None else max_retries
+        self.backoff_base = _env_float("LLM_BACKOFF_BASE", "0.25") if backoff_base is None else backoff_base
+        self.backoff_cap = _env_float("LLM_BACKOFF_CAP", "4") if backoff_cap is None else backoff_cap
+        self.hedge = os.getenv("LLM_HEDGE", "0") == "1" if hedge is None else hedge
+        self.hedge_min_samples = hedge_min_samples
+
+        self.http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=keepalive,
+                keepalive_expiry=60
+            )
+        )
+        # Retries live here, so the SDK's own retry loop is switched off.
+        self.api = AsyncGroq(
+            api_key=api_key or os.getenv("GROQ_API_KEY"),
+            base_url=base_url or os.getenv("GROQ_BASE_URL") or None,
+            http_client=self.http_client,
+            max_retries=0
+        )
+
+        # One window per (model, stream): time to headers and time to a full
+        # completion, or an 8B and a 70B model, share no useful percentile.
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    @staticmethod
+    def _window_key(kwargs):
+        return kwargs.get("model"), bool(kwargs.get("stream"))
+
+    def hedge_delay(self, key):
+        with self._lock:
+            latencies = self._latencies.get(key)
+            if not self.hedge or latencies is None or len(latencies) < self.hedge_min_samples:
+                return None
+            return _percentile(latencies, 0.95)
+
+    def backoff(self, attempt, error=None):
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    async def _timed(self, kwargs):
+        start = time.monotonic()
+        response = await self.api.chat.completions.create(**kwargs)
+        with self._lock:
+            window = self._latencies.setdefault(self._window_key(kwargs), deque(maxlen=500))
+            window.append(time.monotonic() - start)
+        return response
+
+    @staticmethod
+    async def _discard(task):
+        """Cancel a losing hedge, or close its stream if it already finished."""
+        if not task.done():
+            task.cancel()
+            return
+        if task.cancelled() or task.exception() is not None:
+            return
+        close = getattr(task.result(), "close", None)
+        if close is not None:
+            closed = close()
+            if asyncio.iscoroutine(closed):
+                await closed
+
+    async def _hedged(self, kwargs):
+        delay = self.hedge_delay(self._window_key(kwargs))
+        first = asyncio.ensure_future(self._timed(kwargs))
+        if delay is None:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self._count("hedges")
+        second = asyncio.ensure_future(self._timed(kwargs))
+        pending = {first, second}
+        error = None
+        winner = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is second:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Both may have answered in the same wakeup; the loser's stream must be closed.
+            for task in {first, second} - {winner}:
+                await self._discard(task)
+
+    async def create(self, **kwargs):
+        """Same arguments and return value as chat.completions.create."""
+        self._count("requests")
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._hedged(kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                await asyncio.sleep(self.backoff(attempt, e))
+            except APIStatusError:
+                self._count("failures")
+                raise
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            windows = {key: list(latencies) for key, latencies in self._latencies.items()}
+        stats["latency"] = {
+            f"{model}/{'stream' if stream else 'complete'}": {
+                "samples": len(latencies),
+                "p50_s": _percentile(latencies, 0.5),
+                "p95_s": _percentile(latencies, 0.95)
+            }
+            for (model, stream), latencies in windows.items()
+        }
+        return stats
+
+    async def aclose(self):
+        await self.http_client.aclose()
@@ -0,0 +1,133 @@
+import re
+import threading
+from datetime import date as Date, timedelta
+
+from agent.catalog import get_catalog
+from agent.matcher import KeywordMatcher
+from agent.tools import RESTAURANTS_FILE
+
+CUISINE_MAPPING = {
+    "indian": "Indian", "italian": "Italian", "japanese": "Japanese", "chinese": "Chinese",
+    "barbecue": "Barbecue", "bbq": "Barbecue", "seafood": "Seafood", "mexican": "Mexican",
+    "greek": "Greek", "french": "French", "steakhouse": "Steakhouse", "steak": "Steakhouse",
+    "vegetarian": "Vegetarian", "veg": "Vegetarian", "korean": "Korean", "thai": "Thai",
+    "mediterranean": "Mediterranean", "fast food": "Fast Food", "fastfood": "Fast Food",
+    "desserts": "Desserts", "dessert": "Desserts", "north indian": "North Indian",
+    "south indian": "South Indian", "turkish": "Turkish", "turkey": "Turkish",
+    "moroccan": "Moroccan", "american": "American", "middle eastern": "Middle Eastern",
+    "spanish": "Spanish", "healthy": "Healthy", "mughlai": "Mughlai", "african": "African",
+    "russian": "Russian", "persian": "Persian", "iranian": "Persian", "brazilian": "Brazilian",
+    "vietnamese": "Vietnamese", "caribbean": "Caribbean", "german": "German",
+    "nepalese": "Nepalese", "nepal": "Nepalese", "indonesian": "Indonesian",
+    "cuban": "Cuban", "swedish": "Swedish", "ethiopian": "Ethiopian",
+    "lebanese": "Lebanese", "lebanon": "Lebanese", "hawaiian": "Hawaiian",
+    "singaporean": "Singaporean", "austrian": "Austrian", "irish": "Irish",
+    "polish": "Polish", "syrian": "Syrian", "ukrainian": "Ukrainian",
+    "continental": "Continental", "sushi": "Japanese", "pasta": "Italian",
+    "pizza": "Italian", "noodles": "Chinese", "curry": "Indian", "taco": "Mexican",
+    "pho": "Vietnamese", "kebab": "Turkish", "tapas": "Spanish"
+}
+
+CUISINE_MATCHER = KeywordMatcher(CUISINE_MAPPING)
+
+DATE_RE = re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b|\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})\b")
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+RELATIVE_DATE_RE = re.compile(r"\b(today|tonight|tomorrow|" + "|".join(WEEKDAYS) + r")\b")
+TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b([01]?\d|2[0-3]):([0-5]\d)\b")
+PHONE_RE = re.compile(r"\+\d{1,3}[\s-]?\d[\d\s-]{6,}\d|\b\d{10}\b")
+GUESTS_RE = re.compile(
+    r"\b(\d{1,3})\s*(?:people|persons|person|guests|guest|pax|adults|of us)\b"
+    r"|\b(?:for|party of|table of)\s+(\d{1,3})\b(?!\s*(?:am|pm|:|[-/.]\d))"
+)
+
+
+def _relative_date(word, today):
+    # A weekday means its next occurrence, today included.
+    if word in ("today", "tonight"):
+        return today
+    if word == "tomorrow":
+        return today + timedelta(days=1)
+    return today + timedelta(days=(WEEKDAYS.index(word) - today.weekday()) % 7)
+
+
+def _extract_dates(text, today=None):
+    found = []
+    for m in DATE_RE.finditer(text):
+        if m.group(1):
+            year, month, day = m.group(1), m.group(2), m.group(3)
+        else:
+            day, month, year = m.group(4), m.group(5), m.group(6)
+        found.append((m.start(), f"{int(day):02d}-{int(month):02d}-{year}"))
+    for m in RELATIVE_DATE_RE.finditer(text):
+        day = _relative_date(m.group(1), today or Date.today())
+        found.append((m.start(), day.strftime("%d-%m-%Y")))
+    # In the order they were written, so the last one mentioned wins.
+    return [value for _, value in sorted(found)]
+
+
+def _extract_times(text):
+    times = []
+    for m in TIME_RE.finditer(text):
+        if m.group(1):
+            minute = m.group(2) or "00"
+            times.append(f"{int(m.group(1))}:{minute} {m.group(3).upper()}")
+        else:
+            times.append(f"{int(m.group(4)):02d}:{m.group(5)}")
+    return times
+
+
+def _extract_guests(text):
+    m = GUESTS_RE.search(text)
+    if not m:
+        return None
+    return int(m.group(1) or m.group(2))
+
+
+class EntityExtractor:
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.cuisines = CUISINE_MATCHER
+        self.locations = KeywordMatcher({
+            r["location"].lower(): r["location"] for r in catalog.restaurants
+        })
+        self.names = KeywordMatcher({
+            r["name"].lower(): r["name"] for r in catalog.restaurants
+        })
+
+    def extract(self, text):
+        lower = text.lower()
+        return {
+            "cuisines": [m[3] for m in self.cuisines.longest_matches(lower)],
+            "locations": [m[3] for m in self.locations.longest_matches(lower)],
+            "restaurants": [m[3] for m in self.names.longest_matches(lower)],
+            "guests": _extract_guests(lower),
+            "dates": _extract_dates(lower),
+            "times": _extract_times(lower),
+            "phone_numbers": [p.strip() for p in PHONE_RE.findall(text)]
+        }
+
+
+def find_cuisine(text):
+    matches = CUISINE_MATCHER.longest_matches(text)
+    return matches[0][3] if matches else None
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_extractor():
+    global _extractor
+    catalog = get_catalog(RESTAURANTS_FILE)
+    extractor = _extractor
+    if extractor is None or extractor.catalog is not catalog:
+        with _extractor_lock:
+            if _extractor is None or _extractor.catalog is not catalog:
+                _extractor = EntityExtractor(catalog)
+            extractor = _extractor
+    return extractor
+
+
+def extract_entities(text):
+    return get_extractor().extract(text)
@@ -0,0 +1,123 @@
+import os
+import re
+import threading
+from collections import deque
+
+from agent.entities import extract_entities
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "4"))
+MESSAGE_OVERHEAD_TOKENS = 4
+
+FOUND_RESTAURANT_RE = re.compile(r"found (.+?) \(ID: (\d+)\)")
+RESERVATION_ID_RE = re.compile(r"reservation(?:\s+id)?[:#\s]+(\d+)", re.IGNORECASE)
+ASKED_NAME_RE = re.compile(r"\bfull name\b|\byour name\b", re.IGNORECASE)
+SUMMARY_PREFIX = "Summary of earlier conversation"
+
+_reports = deque(maxlen=200)
+_reports_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English; close enough to budget with.
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
+def message_tokens(message):
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def summarize_booking_state(messages):
+    state = {}
+    asked_for_name = False
+
+    for message in messages:
+        content = message.get("content") or ""
+        if message.get("role") == "assistant":
+            found = FOUND_RESTAURANT_RE.findall(content)
+            if found:
+                state["restaurant"] = f"{found[-1][0]} (ID: {found[-1][1]})"
+            reservation = RESERVATION_ID_RE.findall(content)
+            if reservation:
+                state["reservation_id"] = reservation[-1]
+            asked_for_name = bool(ASKED_NAME_RE.search(content))
+            continue
+
+        if message.get("role") != "user":
+            continue
+
+        entities = extract_entities(content)
+        if entities["cuisines"]:
+            state["cuisine"] = entities["cuisines"][-1]
+        if entities["locations"]:
+            state["location"] = entities["locations"][-1]
+        if entities["restaurants"]:
+            state["restaurant"] = entities["restaurants"][-1]
+        if entities["guests"]:
+            state["guests"] = entities["guests"]
+        if entities["dates"]:
+            state["date"] = entities["dates"][-1]
+        if entities["times"]:
+            state["time"] = entities["times"][-1]
+        if entities["phone_numbers"]:
+            state["phone_number"] = entities["phone_numbers"][-1]
+        if asked_for_name and len(content.split()) <= 5 and not any(ch.isdigit() for ch in content):
+            state["user_name"] = content.strip()
+        asked_for_name = False
+
+    return state
+
+
+def summary_message(state):
+    details = ", ".join(f"{k.replace('_', ' ')}: {v}" for k, v in state.items())
+    return {
+        "role": "system",
+        "content": f"{SUMMARY_PREFIX} (older turns omitted). Details collected so far - {details}"
+    }
+
+
+def window_history(history, budget=None, keep_turns=None):
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+    keep_turns = HISTORY_KEEP_TURNS if keep_turns is None else keep_turns
+
+    recent = list(history[-keep_turns * 2:]) if keep_turns > 0 else []
+    older = list(history[:len(history) - len(recent)])
+
+    recent_tokens = sum(message_tokens(m) for m in recent)
+    while len(recent) > 2 and recent_tokens > budget:
+        dropped = recent.pop(0)
+        older.append(dropped)
+        recent_tokens -= message_tokens(dropped)
+
+    window = recent
+    if older:
+        state = summarize_booking_state(older)
+        if state:
+            window = [summary_message(state)] + recent
+
+    report = {
+        "history_messages": len(history),
+        "kept_messages": len(recent),
+        "summarized_messages": len(older),
+        "tokens_full": sum(message_tokens(m) for m in history),
+        "tokens_windowed": sum(message_tokens(m) for m in window)
+    }
+    with _reports_lock:
+        _reports.append(report)
+    return window, report
+
+
+def history_report():
+    with _reports_lock:
+        reports = list(_reports)
+    full = sum(r["tokens_full"] for r in reports)
+    windowed = sum(r["tokens_windowed"] for r in reports)
+    return {
+        "turns": len(reports),
+        "tokens_full": full,
+        "tokens_windowed": windowed,
+        "tokens_saved": full - windowed,
+        "last_turn": reports[-1] if reports else None
+    }
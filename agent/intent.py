@@ -0,0 +1,172 @@
+import re
+import threading
+
+from agent.entities import get_extractor
+
+FAST_PATH_THRESHOLD = 0.8
+
+SEARCH_WORDS = {
+    "show", "list", "find", "search", "any", "suggest", "recommend", "options",
+    "restaurant", "restaurants", "food", "place", "places", "cuisine", "spots"
+}
+BOOKING_WORDS = {"book", "reserve", "reservation", "table"}
+# Anything that depends on conversation state or mutates a booking goes to the LLM.
+BLOCKING_WORDS = {
+    "cancel", "change", "update", "modify", "reschedule", "confirm", "yes", "no",
+    "not", "don't", "dont", "instead", "tomorrow", "today", "tonight", "my"
+}
+FILLER_WORDS = {
+    "a", "an", "the", "at", "in", "for", "me", "please", "i", "want", "to", "would",
+    "like", "some", "can", "you", "show", "list", "find", "search", "get", "lets",
+    "let's", "us", "of", "near", "around", "good", "best", "top", "go", "with"
+}
+
+MANAGE_WORDS = {"cancel", "change", "update", "modify", "reschedule", "move"}
+# Verbs that start a new booking; together with a manage word the turn may need both tool sets.
+NEW_BOOKING_WORDS = {"book", "reserve"}
+# A greeting may only be followed by a few filler words; "hello italian" is a search.
+GREETING_RE = re.compile(
+    r"^\s*(hi|hello|hey|hiya|good (morning|afternoon|evening)|thanks|thank you|bye|goodbye)\b"
+    r"[\s!.,]*(there|all|everyone|team|bot|friend|again|so much|very much|a lot)?[\s!.]*$"
+)
+
+_WORD_RE = re.compile(r"[a-z']+")
+_DIGIT_RE = re.compile(r"\d")
+
+_stats_lock = threading.Lock()
+_stats = {"messages": 0, "hits": 0, "misses": 0, "by_tool": {}}
+
+
+class IntentRouter:
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.cuisines = extractor.cuisines
+        self.locations = extractor.locations
+        self.names = extractor.names
+
+    def classify(self, text):
+        lower = text.lower().strip()
+        if not lower or _DIGIT_RE.search(lower):
+            return None
+
+        words = _WORD_RE.findall(lower)
+        if not words or BLOCKING_WORDS.intersection(words):
+            return None
+
+        names = self.names.longest_matches(lower)
+        if len(names) == 1:
+            start, end, _, name = names[0]
+            rest = [w for w in _WORD_RE.findall(lower[:start] + " " + lower[end:])
+                    if w not in FILLER_WORDS and w not in BOOKING_WORDS]
+            if not rest:
+                return {
+                    "tool": "find_restaurant_by_name",
+                    "arguments": {"restaurant_name": name},
+                    "confidence": 0.95
+                }
+            return None
+
+        if BOOKING_WORDS.intersection(words):
+            return None
+
+        cuisines = self.cuisines.longest_matches(lower)
+        if len({m[3] for m in cuisines}) != 1:
+            return None
+
+        arguments = {"cuisine": cuisines[0][3]}
+        covered = [lower[m[0]:m[1]] for m in cuisines]
+
+        locations = self.locations.longest_matches(lower)
+        if len(locations) == 1:
+            arguments["location"] = locations[0][3]
+            covered.append(lower[locations[0][0]:locations[0][1]])
+        elif len(locations) > 1:
+            return None
+
+        covered_words = set(_WORD_RE.findall(" ".join(covered)))
+        rest = [w for w in words if w not in covered_words and w not in FILLER_WORDS]
+        unknown = [w for w in rest if w not in SEARCH_WORDS]
+
+        if unknown:
+            return None
+        confidence = 0.9 if rest or len(words) <= 2 else 0.7
+        return {"tool": "search_restaurants", "arguments": arguments, "confidence": confidence}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    global _router
+    extractor = get_extractor()
+    router = _router
+    if router is None or router.extractor is not extractor:
+        with _router_lock:
+            if _router is None or _router.extractor is not extractor:
+                _router = IntentRouter(extractor)
+            router = _router
+    return router
+
+
+def classify_intent(text):
+    intent = get_router().classify(text)
+    confident = intent is not None and intent["confidence"] >= FAST_PATH_THRESHOLD
+
+    with _stats_lock:
+        _stats["messages"] += 1
+        if confident:
+            _stats["hits"] += 1
+            by_tool = _stats["by_tool"]
+            by_tool[intent["tool"]] = by_tool.get(intent["tool"], 0) + 1
+        else:
+            _stats["misses"] += 1
+
+    return intent if confident else None
+
+
+def fast_path_stats():
+    with _stats_lock:
+        stats = {
+            "messages": _stats["messages"],
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "by_tool": dict(_stats["by_tool"])
+        }
+    stats["hit_rate"] = stats["hits"] / stats["messages"] if stats["messages"] else 0.0
+    return stats
+
+
+# Intents that mean the user left an unfinished booking for something else.
+LEAVES_BOOKING = {"manage", "search"}
+
+
+def prompt_intent(text, state=None):
+    """Pick the prompt/tool variant for a turn; "general" means the full prompt.
+
+    A booking in progress keeps the booking variant, unless the turn is
+    clearly about managing reservations or searching.
+    """
+    intent = _text_intent(text)
+    if state is not None and state.active and intent not in LEAVES_BOOKING:
+        return "booking"
+    return intent
+
+
+def _text_intent(text):
+    lower = text.lower().strip()
+    words = set(_WORD_RE.findall(lower))
+    if GREETING_RE.match(lower):
+        return "greeting"
+    if MANAGE_WORDS.intersection(words):
+        # "cancel my table reservation" is managing; "cancel that and book
+        # another table" needs the full schema.
+        return "general" if NEW_BOOKING_WORDS.intersection(words) else "manage"
+
+    extractor = get_extractor()
+    if BOOKING_WORDS.intersection(words) or extractor.names.longest_matches(lower):
+        return "booking"
+    if extractor.cuisines.longest_matches(lower) or SEARCH_WORDS.intersection(words):
+        return "search"
+    return "general"
@@ -1,35 +1,227 @@
 import os
 import json
 import re
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
 from dotenv import load_dotenv
 load_dotenv()
 
-from groq import Groq
 from groq import BadRequestError
-from agent.prompts import SYSTEM_PROMPT
-from agent.tools_schema import TOOL_SCHEMA
-from agent.router import execute_tool
+from agent.client import LLMClient
+from agent.prompts import BOOKING_SLOT_PROMPT, build_system_prompt
+from agent.tools_schema import TOOL_SCHEMA, tools_for_intent
+from agent.router import execute_tool, execute_tool_async
+from agent.intent import classify_intent, prompt_intent
+from agent.entities import find_cuisine
+from agent.availability import display_date
+from agent.cache import ResponseCache, cache_key, is_cacheable
+from agent.history import window_history
+from agent.booking import SLOT_DESCRIPTIONS, SLOT_QUESTIONS, booking_reply
+from agent.models import MODEL_TIERS, ModelStats, is_tool_use_failure, response_problem
+from agent.tracing import (
+    METRICS_PORT,
+    TRACING_ENABLED,
+    annotate_turn,
+    count,
+    metrics,
+    recent_turns,
+    span,
+    start_metrics_server,
+    turn_span
+)
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-MODEL = "llama-3.1-8b-instant"
+# GROQ_BASE_URL can point this at a local fake server (benchmarks/fake_llm_server.py).
+client = LLMClient()
+MODEL = MODEL_TIERS[0]
+model_stats = ModelStats()
+metrics_server = start_metrics_server(int(METRICS_PORT)) if TRACING_ENABLED and METRICS_PORT else None
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "300")),
+    disk_path=os.getenv("LLM_CACHE_PATH") or None
+)
+MAX_TOOL_ITERATIONS = 4
+TURN_TIMEOUT_SECONDS = 30
+READ_ONLY_TOOLS = {
+    "search_restaurants",
+    "recommend_restaurants",
+    "check_availability",
+    "check_availability_bulk",
+    "find_restaurant_by_name",
+    "find_reservations"
+}
+
+LEAKED_CALL_PATTERNS = [
+    re.compile(r'=\s*\w+\s*[{<].*?[}>]', re.DOTALL),
+    re.compile(r'<function.*?</function>', re.DOTALL),
+    re.compile(r'function=\w+>.*?\}', re.DOTALL),
+    re.compile(r'/function\w+\{[^}]*\}/function', re.DOTALL),
+    re.compile(r'\{"cuisine":[^}]*\}'),
+    re.compile(r'\{"name":[^}]*\}'),
+    re.compile(r'\{"required":[^}]*\}'),
+    re.compile(r'[<>]'),
+]
+WHITESPACE_RE = re.compile(r'\s+')
+ANGLE_BRACKETS_RE = re.compile(r'[<>]')
+MALFORMED_PATTERNS = [
+    re.compile(r'/function(\w+)\{([^}]+)\}/function'),
+    re.compile(r'<function.*?name="(\w+)".*?>\{([^}]+)\}</function>'),
+    re.compile(r'(\w+)\{([^}]+)\}'),
+]
+BOOKING_PATTERNS = [
+    re.compile(r"book.*?table.*?for\s+(\d+).*?(at|in)\s+([a-zA-Z\s]+)(?:\s+restaurant)?"),
+    re.compile(r"table.*?for\s+(\d+).*?(at|in)\s+([a-zA-Z\s]+)(?:\s+restaurant)?"),
+    re.compile(r"reservation.*?for\s+(\d+).*?(at|in)\s+([a-zA-Z\s]+)(?:\s+restaurant)?")
+]
+CUISINE_ARG_RE = re.compile(r'"cuisine":\s*"([^"]+)"')
+NAME_ARG_RE = re.compile(r'"name":\s*"([^"]+)"')
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    # One long-lived loop shared by every sync caller, so the async client's
+    # connection pool is reused instead of being torn down per turn.
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-loop", daemon=True).start()
+    return _loop
+
+
+def run_sync(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def iterate_sync(agen):
+    loop = _background_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
 
 def clean_llm_output(text: str) -> str:
     if not isinstance(text, str):
         return text
 
-    text = re.sub(r'=\s*\w+\s*[{<].*?[}>]', '', text, flags=re.DOTALL)
-    text = re.sub(r'<function.*?</function>', '', text, flags=re.DOTALL)
-    text = re.sub(r'function=\w+>.*?\}', '', text, flags=re.DOTALL)
-    text = re.sub(r'/function\w+\{[^}]*\}/function', '', text, flags=re.DOTALL)
-    text = re.sub(r'\{"cuisine":[^}]*\}', '', text)
-    text = re.sub(r'\{"name":[^}]*\}', '', text)
-    text = re.sub(r'\{"required":[^}]*\}', '', text)
-    text = re.sub(r'[<>]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    for pattern in LEAKED_CALL_PATTERNS:
+        text = pattern.sub('', text)
+    text = WHITESPACE_RE.sub(' ', text).strip()
 
     return text
 
 
+class StreamingOutputFilter:
+    """Incremental counterpart of clean_llm_output for streamed text.
+
+    A leaked tool-call fragment can be split across chunks, so anything that
+    might be the start of one is held back until it is either closed (and
+    dropped) or proven to be ordinary text. That includes the bare
+    `search_restaurants{"cuisine": ...}` form: a trailing word is held until
+    the next chunk shows whether a call name and a brace follow it.
+    """
+
+    FRAGMENTS = {
+        "<function": "</function>",
+        "/function": "}/function",
+        "function=": "}",
+        '{"cuisine":': "}",
+        '{"name":': "}",
+        '{"required":': "}"
+    }
+    _START = re.compile("|".join(re.escape(m) for m in FRAGMENTS))
+    # Same shape models.LEAKED_TOOL_CALL_RE detects after the fact.
+    _CALL_START = re.compile(r"\b\w+_\w+\s*\{")
+    _TRAILING_WORD = re.compile(r"(\w*_\w*\s*|\w+)$")
+
+    def __init__(self):
+        self._buffer = ""
+        self.dropped = False
+
+    def _held_suffix(self, text):
+        for size in range(min(len(text), max(map(len, self.FRAGMENTS))), 0, -1):
+            tail = text[-size:]
+            if any(marker.startswith(tail) for marker in self.FRAGMENTS):
+                return size
+        word = self._TRAILING_WORD.search(text)
+        return len(word.group(0)) if word else 0
+
+    def _next_fragment(self):
+        """(start, end) of the first leaked fragment; end is None while it is still open."""
+        marker = self._START.search(self._buffer)
+        call = self._CALL_START.search(self._buffer)
+        if call is not None and (marker is None or call.start() < marker.start()):
+            return call.start(), _closing_brace(self._buffer, call.end() - 1)
+        if marker is None:
+            return None
+        terminator = self.FRAGMENTS[marker.group(0)]
+        end = self._buffer.find(terminator, marker.end())
+        return marker.start(), None if end == -1 else end + len(terminator)
+
+    def feed(self, chunk):
+        self._buffer += chunk or ""
+        out = []
+        while True:
+            fragment = self._next_fragment()
+            if fragment is None:
+                held = self._held_suffix(self._buffer)
+                out.append(self._buffer[:len(self._buffer) - held])
+                self._buffer = self._buffer[len(self._buffer) - held:]
+                break
+
+            start, end = fragment
+            out.append(self._buffer[:start])
+            if end is None:
+                self._buffer = self._buffer[start:]
+                break
+            self.dropped = True
+            self._buffer = self._buffer[end:]
+
+        return ANGLE_BRACKETS_RE.sub('', "".join(out))
+
+    def flush(self):
+        rest = self._buffer
+        self._buffer = ""
+        starts = [m.start() for m in (self._START.search(rest), self._CALL_START.search(rest)) if m]
+        if starts:
+            # An unterminated call at the end of the reply.
+            self.dropped = True
+            rest = rest[:min(starts)]
+        return ANGLE_BRACKETS_RE.sub('', rest)
+
+
+def _closing_brace(text, start):
+    """Index just past the brace matching text[start], skipping JSON strings; None if open."""
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
 def format_tool_output(name, output):
 
     if name in ["search_restaurants", "recommend_restaurants"]:
@@ -56,13 +248,28 @@ def format_tool_output(name, output):
     if name == "check_availability":
         return "✔ A table is available at that time." if output.get("available") else "❌ No table available."
 
+    if name == "check_availability_bulk":
+        if not output.get("success"):
+            return output.get("error") or "❌ Could not check availability."
+        results = output.get("results") or []
+        if not results:
+            return "No restaurants found for your request."
+
+        text = f"Availability on {output['date']}:\n\n"
+        for r in results:
+            free = [t for t, ok in zip(output["times"], r["availability"]) if ok]
+            slots = ", ".join(free) if free else "fully booked"
+            text += f"• {r['name']} (ID: {r['id']}) - {r['location']}: {slots}\n"
+        return text
+
     if name == "create_reservation":
         if output.get("success") and "reservation" in output:
             r = output["reservation"]
             return (
                 "✅ Reservation Confirmed!\n\n"
+                f"Reservation ID: {r['reservation_id']}\n"
                 f"Restaurant ID: {r['restaurant_id']}\n"
-                f"Date: {r['date']}\n"
+                f"Date: {display_date(r['date'])}\n"
                 f"Time: {r['time']}\n"
                 f"Guests: {r['guests']}\n"
                 f"Phone: {r['phone_number']}\n"
@@ -70,6 +277,20 @@ def format_tool_output(name, output):
             )
         return "❌ Reservation failed. Please try again."
 
+    if name == "find_reservations":
+        if not output.get("success"):
+            return output.get("error") or "❌ Could not look up reservations."
+        reservations = output.get("reservations") or []
+        if not reservations:
+            return "I couldn't find any upcoming bookings with those details."
+        text = "Your bookings:\n\n"
+        for r in reservations:
+            text += (
+                f"• Reservation {r['reservation_id']}: {r['restaurant_name'] or 'Restaurant ' + str(r['restaurant_id'])}"
+                f" on {display_date(r['date'])} at {r['time']} for {r['guests']} guests\n"
+            )
+        return text
+
     if name == "find_restaurant_by_name":
         if output.get("success"):
             r = output["restaurant"]
@@ -85,204 +306,580 @@ def format_tool_output(name, output):
     return clean_llm_output(json.dumps(output, indent=2))
 
 
-def call_llm(messages):
-    return client.chat.completions.create(
-        model=MODEL,
+def response_to_cache(message):
+    return {
+        "content": message.content,
+        "tool_calls": [
+            {"id": tc.id, "name": tc.function.name, "arguments": tc.function.arguments}
+            for tc in (message.tool_calls or [])
+        ]
+    }
+
+
+def _cached_tool_calls(entry):
+    return [
+        SimpleNamespace(
+            id=tc["id"],
+            type="function",
+            function=SimpleNamespace(name=tc["name"], arguments=tc["arguments"])
+        )
+        for tc in entry["tool_calls"]
+    ]
+
+
+def response_from_cache(entry):
+    message = SimpleNamespace(content=entry["content"], tool_calls=_cached_tool_calls(entry) or None)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+async def _cache_lookup(messages, tools=TOOL_SCHEMA, model=MODEL):
+    if not response_cache.enabled:
+        return None, None
+    if not is_cacheable(messages):
+        response_cache.bypass()
+        return None, None
+    key = cache_key(messages, model, tools)
+    return key, await response_cache.aget(key)
+
+
+def _record_usage(model, usage):
+    if usage is None:
+        return
+    count("llm_prompt_tokens_total", usage.prompt_tokens or 0, model=model)
+    count("llm_completion_tokens_total", usage.completion_tokens or 0, model=model)
+
+
+def _chunk_usage(chunk):
+    # OpenAI-style streams put usage on the last chunk; Groq nests it under x_groq.
+    usage = getattr(chunk, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+    return usage
+
+
+def _tool_kwargs(tools):
+    # Groq rejects tool_choice without tools, so tool-less variants send neither.
+    if not tools:
+        return {}
+    return {"tools": tools, "tool_choice": "auto"}
+
+
+async def call_llm(messages, tools=TOOL_SCHEMA):
+    key, cached = await _cache_lookup(messages, tools)
+    if cached is not None:
+        return response_from_cache(cached)
+
+    for tier, model in enumerate(MODEL_TIERS):
+        last = tier == len(MODEL_TIERS) - 1
+        start = time.monotonic()
+        try:
+            with span("llm_call", model=model, stream="false"):
+                response = await client.create(
+                    model=model,
+                    messages=messages,
+                    **_tool_kwargs(tools)
+                )
+            _record_usage(model, getattr(response, "usage", None))
+        except BadRequestError as e:
+            model_stats.record(model, time.monotonic() - start, ok=False)
+            if last or not is_tool_use_failure(e):
+                raise
+            model_stats.escalate(model, "tool_use_failed")
+            continue
+
+        msg = response.choices[0].message
+        problem = response_problem(msg.content, msg.tool_calls, tools)
+        model_stats.record(model, time.monotonic() - start, ok=problem is None)
+        if problem is None or last:
+            break
+        model_stats.escalate(model, problem)
+
+    if key is not None and problem is None:
+        response_cache.set(key, response_to_cache(response.choices[0].message))
+    return response
+
+
+async def call_llm_plain(messages, max_tokens=80):
+    key, cached = await _cache_lookup(messages, tools=[])
+    if cached is not None:
+        return response_from_cache(cached)
+
+    with span("llm_call", model=MODEL, stream="false"):
+        response = await client.create(
+            model=MODEL,
+            messages=messages,
+            max_tokens=max_tokens
+        )
+    _record_usage(MODEL, getattr(response, "usage", None))
+    if key is not None:
+        response_cache.set(key, response_to_cache(response.choices[0].message))
+    return response
+
+
+async def _replay_stream(entry):
+    tool_calls = [
+        SimpleNamespace(index=i, id=tc.id, function=tc.function)
+        for i, tc in enumerate(_cached_tool_calls(entry))
+    ]
+    delta = SimpleNamespace(content=entry["content"], tool_calls=tool_calls or None)
+    yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+async def _recording_stream(stream, key, tools):
+    content = ""
+    calls = {}
+    async for chunk in stream:
+        if chunk.choices:
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content += delta.content
+            if delta.tool_calls:
+                merge_tool_call_deltas(calls, delta.tool_calls)
+        yield chunk
+    message = SimpleNamespace(content=content or None, tool_calls=[calls[i] for i in sorted(calls)])
+    if response_problem(message.content, message.tool_calls, tools) is None:
+        response_cache.set(key, response_to_cache(message))
+
+
+async def call_llm_stream(messages, tools=TOOL_SCHEMA, model=MODEL):
+    key, cached = await _cache_lookup(messages, tools, model)
+    if cached is not None:
+        return _replay_stream(cached)
+
+    stream = await client.create(
+        model=model,
         messages=messages,
-        tools=TOOL_SCHEMA,
-        tool_choice="auto"
+        stream=True,
+        **_tool_kwargs(tools)
     )
+    if key is not None:
+        return _recording_stream(stream, key, tools)
+    return stream
+
+
+def remaining(deadline):
+    return max(deadline - time.monotonic(), 0)
+
+
+async def until_deadline(stream, deadline):
+    """Chunks of a streamed completion; TimeoutError once the turn deadline passes."""
+    chunks = stream.__aiter__()
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), remaining(deadline))
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+        if close is not None:
+            closed = close()
+            if asyncio.iscoroutine(closed):
+                await closed
+
+
+def cache_stats():
+    return response_cache.stats()
+
+
+def client_stats():
+    return client.stats()
+
+
+def model_tier_stats():
+    return model_stats.stats()
+
+
+def tracing_stats():
+    return {"metrics": metrics.snapshot(), "recent_turns": recent_turns()}
+
+
+def merge_tool_call_deltas(calls, deltas):
+    for delta in deltas:
+        call = calls.get(delta.index)
+        if call is None:
+            call = SimpleNamespace(
+                id=None,
+                type="function",
+                function=SimpleNamespace(name="", arguments="")
+            )
+            calls[delta.index] = call
+        if delta.id:
+            call.id = delta.id
+        if delta.function:
+            if delta.function.name:
+                call.function.name += delta.function.name
+            if delta.function.arguments:
+                call.function.arguments += delta.function.arguments
 
 
 def handle_cuisine_request_fallback(user_input):
-    cuisine_mapping = {
-        "indian": "Indian", "italian": "Italian", "japanese": "Japanese", "chinese": "Chinese",
-        "barbecue": "Barbecue", "bbq": "Barbecue", "seafood": "Seafood", "mexican": "Mexican",
-        "greek": "Greek", "french": "French", "steakhouse": "Steakhouse", "steak": "Steakhouse",
-        "vegetarian": "Vegetarian", "veg": "Vegetarian", "korean": "Korean", "thai": "Thai",
-        "mediterranean": "Mediterranean", "fast food": "Fast Food", "fastfood": "Fast Food",
-        "desserts": "Desserts", "dessert": "Desserts", "north indian": "North Indian",
-        "south indian": "South Indian", "turkish": "Turkish", "turkey": "Turkish",
-        "moroccan": "Moroccan", "american": "American", "middle eastern": "Middle Eastern",
-        "spanish": "Spanish", "healthy": "Healthy", "mughlai": "Mughlai", "african": "African",
-        "russian": "Russian", "persian": "Persian", "iranian": "Persian", "brazilian": "Brazilian",
-        "vietnamese": "Vietnamese", "caribbean": "Caribbean", "german": "German",
-        "nepalese": "Nepalese", "nepal": "Nepalese", "indonesian": "Indonesian",
-        "cuban": "Cuban", "swedish": "Swedish", "ethiopian": "Ethiopian",
-        "lebanese": "Lebanese", "lebanon": "Lebanese", "hawaiian": "Hawaiian",
-        "singaporean": "Singaporean", "austrian": "Austrian", "irish": "Irish",
-        "polish": "Polish", "syrian": "Syrian", "ukrainian": "Ukrainian"
-    }
-    
-    user_lower = user_input.lower()
-    
-    for cuisine_key, cuisine_value in cuisine_mapping.items():
-        if cuisine_key in user_lower:
-            output = execute_tool("search_restaurants", {"cuisine": cuisine_value})
-            return format_tool_output("search_restaurants", output)
-    
+    cuisine = find_cuisine(user_input)
+    if cuisine:
+        output = execute_tool("search_restaurants", {"cuisine": cuisine})
+        return format_tool_output("search_restaurants", output)
+
     return "I can help you find restaurants. What type of cuisine would you like?"
 
 
-def agent_reply(user_input, history):
+async def run_tool_calls(tool_calls, deadline):
+    # Read-only tools run concurrently; anything that writes runs in call order.
+    results = [None] * len(tool_calls)
+    pending = {}
 
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    messages.extend(history)
-    messages.append({"role": "user", "content": user_input})
+    for i, tool_call in enumerate(tool_calls):
+        tool_name = tool_call.function.name
+        # execute_tool parses and validates the raw argument string.
+        args = tool_call.function.arguments
 
-    try:
-        response = call_llm(messages)
-        choice = response.choices[0]
-        msg = choice.message
-    except BadRequestError as e:
-        error_msg = str(e)
+        if tool_name in READ_ONLY_TOOLS:
+            pending[i] = asyncio.ensure_future(execute_tool_async(tool_name, args))
+        elif not remaining(deadline):
+            results[i] = (tool_call, tool_name, {"error": "Tool timed out"})
+        else:
+            try:
+                output = await asyncio.wait_for(execute_tool_async(tool_name, args), remaining(deadline))
+            except asyncio.TimeoutError:
+                # The write keeps running in its worker thread and may still land.
+                output = {"error": "Tool timed out; the change may still have been applied"}
+            results[i] = (tool_call, tool_name, output)
+
+    if pending:
+        await asyncio.wait(pending.values(), timeout=remaining(deadline))
+
+    for i, task in pending.items():
+        tool_call = tool_calls[i]
+        if task.done():
+            output = task.result()
+        else:
+            task.cancel()
+            output = {"error": "Tool timed out"}
+        results[i] = (tool_call, tool_call.function.name, output)
+
+    return results
+
+
+def format_tool_results(tool_results):
+    return "\n\n".join(
+        clean_llm_output(format_tool_output(name, output))
+        for _, name, output in tool_results
+    )
+
+
+def agent_reply(user_input, history, state=None):
+    with turn_span(mode="reply"):
+        return run_sync(agent_reply_async(user_input, history, state))
+
+
+def _turn_path(path, **attributes):
+    count("agent_turns_total", path=path)
+    annotate_turn(path=path, **attributes)
+
+
+def error_reply(error, user_input, tool_results):
+    count("fallback_total", path="llm_error")
+    if tool_results:
+        return format_tool_results(tool_results)
+    if isinstance(error, BadRequestError):
+        error_msg = str(error)
         if "tool_use_failed" in error_msg or "tool call validation failed" in error_msg:
+            count("fallback_total", path="cuisine_fallback")
             return handle_cuisine_request_fallback(user_input)
-        else:
-            return "I'm having trouble processing your request. Please try again."
-    except Exception as e:
-        return "I'm having trouble processing your request. Please try again."
+    return "I'm having trouble processing your request. Please try again."
 
-    if msg.tool_calls:
 
-        tool_call = msg.tool_calls[0]
-        tool_name = tool_call.function.name
-        raw_args = tool_call.function.arguments
+def append_tool_messages(messages, content, tool_calls, tool_results):
+    messages.append({
+        "role": "assistant",
+        "content": content or "",
+        "tool_calls": [
+            {
+                "id": tc.id,
+                "type": "function",
+                "function": {"name": tc.function.name, "arguments": tc.function.arguments}
+            }
+            for tc in tool_calls
+        ]
+    })
+    for tool_call, _, output in tool_results:
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": json.dumps(output, default=str)
+        })
 
-        try:
-            raw_args = raw_args.strip()
-            raw_args = re.sub(r',\s*}', '}', raw_args)
-            raw_args = re.sub(r',\s*]', ']', raw_args)
-            args = json.loads(raw_args)
-            
-            args = {k: v for k, v in args.items() if v is not None}
-            
-            if tool_name in ["create_reservation", "check_availability", "cancel_reservation"]:
-                if "restaurant_id" in args and isinstance(args["restaurant_id"], str):
-                    args["restaurant_id"] = int(args["restaurant_id"])
-                if "guests" in args and isinstance(args["guests"], str):
-                    args["guests"] = int(args["guests"])
-                if "reservation_id" in args and isinstance(args["reservation_id"], str):
-                    args["reservation_id"] = int(args["reservation_id"])
-            
-            if tool_name == "search_restaurants":
-                if "guests" in args and isinstance(args["guests"], str):
-                    args["guests"] = int(args["guests"])
 
+def build_messages(user_input, history, intent="general"):
+    window, _ = window_history(history)
+    messages = [{"role": "system", "content": build_system_prompt(intent)}]
+    messages.extend(window)
+    messages.append({"role": "user", "content": user_input})
+    return messages
+
+
+async def ask_for_slot(state, slot):
+    collected = [SLOT_DESCRIPTIONS[s] for s in state.slots if s in SLOT_DESCRIPTIONS]
+    messages = [{
+        "role": "system",
+        "content": BOOKING_SLOT_PROMPT.format(
+            restaurant=state.restaurant_name,
+            collected=", ".join(collected) or "nothing yet",
+            missing=SLOT_DESCRIPTIONS[slot]
+        )
+    }]
+    try:
+        response = await call_llm_plain(messages)
+        question = clean_llm_output(response.choices[0].message.content or "")
+    except Exception:
+        question = ""
+    return question or SLOT_QUESTIONS[slot]
+
+
+def update_booking_state(state, tool_results):
+    if state is None:
+        return
+    for _, name, output in tool_results:
+        state.update_from_tool(name, output)
+
+
+async def state_reply(user_input, state):
+    if state is not None:
+        reply = await booking_reply(state, user_input, ask_for_slot, format_tool_output)
+        if reply is not None:
+            _turn_path("booking_state")
+            return reply
+    return await fast_path_reply(user_input, state)
+
+
+async def fast_path_reply(user_input, state=None):
+    intent = classify_intent(user_input)
+    if intent is None:
+        return None
+    _turn_path("fast_path", tool=intent["tool"])
+    output = await execute_tool_async(intent["tool"], intent["arguments"])
+    update_booking_state(state, [(None, intent["tool"], output)])
+    return format_tool_output(intent["tool"], output)
+
+
+def turn_intent(user_input, state):
+    intent = prompt_intent(user_input, state)
+    if state is not None and state.active and intent != "booking":
+        # The user moved on (e.g. to cancelling or searching); stop collecting
+        # booking details from turns that are about something else.
+        state.reset()
+    return intent
+
+
+async def agent_reply_async(user_input, history, state=None):
+
+    reply = await state_reply(user_input, state)
+    if reply is not None:
+        return reply
+
+    intent = turn_intent(user_input, state)
+    _turn_path("llm", intent=intent)
+    messages = build_messages(user_input, history, intent)
+    tools = tools_for_intent(intent)
+
+    deadline = time.monotonic() + TURN_TIMEOUT_SECONDS
+    tool_results = []
+
+    for _ in range(MAX_TOOL_ITERATIONS):
+        try:
+            response = await asyncio.wait_for(call_llm(messages, tools), remaining(deadline))
+            choice = response.choices[0]
+            msg = choice.message
         except Exception as e:
-            return "I couldn't process the booking details. Please repeat."
+            return error_reply(e, user_input, tool_results)
 
-        output = execute_tool(tool_name, args)
+        if not msg.tool_calls:
+            break
 
-        return clean_llm_output(format_tool_output(tool_name, output))
+        tool_results = await run_tool_calls(msg.tool_calls, deadline)
+        update_booking_state(state, tool_results)
+        append_tool_messages(messages, msg.content, msg.tool_calls, tool_results)
 
-    content = msg.content or ""
-    
-    malformed_patterns = [
-        r'/function(\w+)\{([^}]+)\}/function',
-        r'<function.*?name="(\w+)".*?>\{([^}]+)\}</function>',
-        r'(\w+)\{([^}]+)\}',
-    ]
-    
-    for pattern in malformed_patterns:
-        match = re.search(pattern, content)
+        if time.monotonic() >= deadline:
+            return format_tool_results(tool_results)
+    else:
+        return format_tool_results(tool_results)
+
+    if tool_results:
+        return clean_llm_output(msg.content or "") or format_tool_results(tool_results)
+
+    return await salvage_reply(user_input, msg.content or "")
+
+
+def agent_reply_stream(user_input, history, state=None):
+    with turn_span(mode="stream"):
+        yield from iterate_sync(agent_reply_stream_async(user_input, history, state))
+
+
+async def agent_reply_stream_async(user_input, history, state=None):
+
+    reply = await state_reply(user_input, state)
+    if reply is not None:
+        yield reply
+        return
+
+    intent = turn_intent(user_input, state)
+    _turn_path("llm", intent=intent)
+    messages = build_messages(user_input, history, intent)
+    tools = tools_for_intent(intent)
+
+    deadline = time.monotonic() + TURN_TIMEOUT_SECONDS
+    tool_results = []
+    emitted = False
+
+    for _ in range(MAX_TOOL_ITERATIONS):
+        # Escalation is only possible while nothing from this call has been shown.
+        for tier, model in enumerate(MODEL_TIERS):
+            can_escalate = tier < len(MODEL_TIERS) - 1
+            output_filter = StreamingOutputFilter()
+            content = ""
+            calls = {}
+            streamed = False
+            start = time.monotonic()
+
+            try:
+                with span("llm_call", model=model, stream="true"):
+                    stream = await asyncio.wait_for(call_llm_stream(messages, tools, model), remaining(deadline))
+                    async for chunk in until_deadline(stream, deadline):
+                        _record_usage(model, _chunk_usage(chunk))
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta
+                        if delta.tool_calls:
+                            merge_tool_call_deltas(calls, delta.tool_calls)
+                        if delta.content:
+                            content += delta.content
+                            text = output_filter.feed(delta.content)
+                            if text:
+                                streamed = streamed or bool(text.strip())
+                                yield text
+            except Exception as e:
+                model_stats.record(model, time.monotonic() - start, ok=False)
+                if can_escalate and not streamed and isinstance(e, BadRequestError) and is_tool_use_failure(e):
+                    model_stats.escalate(model, "tool_use_failed")
+                    continue
+                if not emitted and not streamed:
+                    yield error_reply(e, user_input, tool_results)
+                return
+
+            text = output_filter.flush()
+            if text:
+                streamed = streamed or bool(text.strip())
+                yield text
+
+            problem = response_problem(content, [calls[i] for i in sorted(calls)], tools)
+            model_stats.record(model, time.monotonic() - start, ok=problem is None)
+            if problem is None or streamed or not can_escalate:
+                break
+            model_stats.escalate(model, problem)
+
+        emitted = emitted or streamed
+
+        if not calls:
+            break
+
+        tool_calls = [calls[i] for i in sorted(calls)]
+        tool_results = await run_tool_calls(tool_calls, deadline)
+        update_booking_state(state, tool_results)
+        append_tool_messages(messages, content, tool_calls, tool_results)
+
+        if time.monotonic() >= deadline:
+            yield format_tool_results(tool_results)
+            return
+    else:
+        yield format_tool_results(tool_results)
+        return
+
+    if emitted:
+        if problem == "tool_call_in_text":
+            # Text went out before the leaked call showed up (the filter kept
+            # the call itself back); run the call it spelled out.
+            with span("salvage"):
+                recovered = await salvage_tool_call(content)
+            if recovered:
+                yield "\n\n" + recovered
+        return
+    if tool_results:
+        yield format_tool_results(tool_results)
+        return
+    yield await salvage_reply(user_input, content)
+
+
+async def salvage_reply(user_input, content):
+    with span("salvage"):
+        return await _salvage_reply(user_input, content)
+
+
+async def salvage_tool_call(content):
+    """Run a tool call the model wrote out as text; its formatted output, or None."""
+    for pattern in MALFORMED_PATTERNS:
+        match = pattern.search(content)
         if match:
             if len(match.groups()) >= 2:
                 tool_name = match.group(1)
                 args_str = match.group(2)
                 
                 if tool_name in ["search_restaurants", "create_reservation", "check_availability", "find_restaurant_by_name", "cancel_reservation", "update_reservation"]:
-                    try:
-                        args_str = "{" + args_str + "}"
-                        args = json.loads(args_str)
-                        
-                        if tool_name in ["create_reservation", "check_availability", "cancel_reservation"]:
-                            if "restaurant_id" in args and isinstance(args["restaurant_id"], str):
-                                args["restaurant_id"] = int(args["restaurant_id"])
-                            if "guests" in args and isinstance(args["guests"], str):
-                                args["guests"] = int(args["guests"])
-                            if "reservation_id" in args and isinstance(args["reservation_id"], str):
-                                args["reservation_id"] = int(args["reservation_id"])
-                        
-                        if tool_name == "search_restaurants":
-                            if "guests" in args and isinstance(args["guests"], str):
-                                args["guests"] = int(args["guests"])
-                        
-                        output = execute_tool(tool_name, args)
+                    output = await execute_tool_async(tool_name, "{" + args_str + "}")
+                    if not output.get("validation_errors"):
+                        count("fallback_total", path="salvage_malformed_call")
                         return clean_llm_output(format_tool_output(tool_name, output))
-                    except:
-                        pass
     
     if any(tool_name in content for tool_name in ["search_restaurants", "create_reservation", "check_availability", "find_restaurant_by_name"]):
         
         if "search_restaurants" in content and "cuisine" in content:
-            cuisine_match = re.search(r'"cuisine":\s*"([^"]+)"', content)
+            cuisine_match = CUISINE_ARG_RE.search(content)
             if cuisine_match:
                 cuisine = cuisine_match.group(1)
-                output = execute_tool("search_restaurants", {"cuisine": cuisine})
+                output = await execute_tool_async("search_restaurants", {"cuisine": cuisine})
+                count("fallback_total", path="salvage_leaked_arguments")
                 return format_tool_output("search_restaurants", output)
         
         if "find_restaurant_by_name" in content and "name" in content:
-            name_match = re.search(r'"name":\s*"([^"]+)"', content)
+            name_match = NAME_ARG_RE.search(content)
             if name_match:
                 name = name_match.group(1)
-                output = execute_tool("find_restaurant_by_name", {"name": name})
+                output = await execute_tool_async("find_restaurant_by_name", {"restaurant_name": name})
+                count("fallback_total", path="salvage_leaked_arguments")
                 return format_tool_output("find_restaurant_by_name", output)
-    
-    cuisine_mapping = {
-        "indian": "Indian", "italian": "Italian", "japanese": "Japanese", "chinese": "Chinese",
-        "barbecue": "Barbecue", "bbq": "Barbecue", "seafood": "Seafood", "mexican": "Mexican",
-        "greek": "Greek", "french": "French", "steakhouse": "Steakhouse", "steak": "Steakhouse",
-        "vegetarian": "Vegetarian", "veg": "Vegetarian", "korean": "Korean", "thai": "Thai",
-        "mediterranean": "Mediterranean", "fast food": "Fast Food", "fastfood": "Fast Food",
-        "desserts": "Desserts", "dessert": "Desserts", "north indian": "North Indian",
-        "south indian": "South Indian", "turkish": "Turkish", "turkey": "Turkish",
-        "moroccan": "Moroccan", "american": "American", "middle eastern": "Middle Eastern",
-        "spanish": "Spanish", "healthy": "Healthy", "mughlai": "Mughlai", "african": "African",
-        "russian": "Russian", "persian": "Persian", "iranian": "Persian", "brazilian": "Brazilian",
-        "vietnamese": "Vietnamese", "caribbean": "Caribbean", "german": "German",
-        "nepalese": "Nepalese", "nepal": "Nepalese", "indonesian": "Indonesian",
-        "cuban": "Cuban", "swedish": "Swedish", "ethiopian": "Ethiopian",
-        "lebanese": "Lebanese", "lebanon": "Lebanese", "hawaiian": "Hawaiian",
-        "singaporean": "Singaporean", "austrian": "Austrian", "irish": "Irish",
-        "polish": "Polish", "syrian": "Syrian", "ukrainian": "Ukrainian",
-        "continental": "Continental", "sushi": "Japanese", "pasta": "Italian",
-        "pizza": "Italian", "noodles": "Chinese", "curry": "Indian", "taco": "Mexican",
-        "pho": "Vietnamese", "kebab": "Turkish", "tapas": "Spanish"
-    }
-    
+
+    return None
+
+
+async def _salvage_reply(user_input, content):
+    # Each exit is counted so fallback_total{path} shows which rescue fired.
+    reply = await salvage_tool_call(content)
+    if reply is not None:
+        return reply
+
+    cuisine = find_cuisine(user_input)
+    if cuisine:
+        output = await execute_tool_async("search_restaurants", {"cuisine": cuisine})
+        count("fallback_total", path="salvage_user_cuisine")
+        return format_tool_output("search_restaurants", output)
+
     user_lower = user_input.lower()
-    for cuisine_key, cuisine_value in cuisine_mapping.items():
-        if (cuisine_key in user_lower or 
-            (cuisine_key + " restaurant") in user_lower or 
-            (cuisine_key + " food") in user_lower or
-            (cuisine_key + " place") in user_lower or
-            ("book " + cuisine_key) in user_lower or
-            ("table " + cuisine_key) in user_lower):
-            
-            output = execute_tool("search_restaurants", {"cuisine": cuisine_value})
-            return format_tool_output("search_restaurants", output)
-    
-    booking_patterns = [
-        r"book.*?table.*?for\s+(\d+).*?(at|in)\s+([a-zA-Z\s]+)(?:\s+restaurant)?",
-        r"table.*?for\s+(\d+).*?(at|in)\s+([a-zA-Z\s]+)(?:\s+restaurant)?",
-        r"reservation.*?for\s+(\d+).*?(at|in)\s+([a-zA-Z\s]+)(?:\s+restaurant)?"
-    ]
-    
-    for pattern in booking_patterns:
-        match = re.search(pattern, user_lower)
+    for pattern in BOOKING_PATTERNS:
+        match = pattern.search(user_lower)
         if match:
             guests = int(match.group(1))
             restaurant_type = match.group(3).strip()
-            
-            for cuisine_key, cuisine_value in cuisine_mapping.items():
-                if cuisine_key in restaurant_type:
-                    output = execute_tool("search_restaurants", {"cuisine": cuisine_value, "guests": guests})
-                    return format_tool_output("search_restaurants", output)
-    
+
+            cuisine = find_cuisine(restaurant_type)
+            if cuisine:
+                output = await execute_tool_async("search_restaurants", {"cuisine": cuisine, "guests": guests})
+                count("fallback_total", path="salvage_booking_pattern")
+                return format_tool_output("search_restaurants", output)
+
     clean = clean_llm_output(content)
 
     if not clean:
+        count("fallback_total", path="salvage_empty")
         return "I can help you book a restaurant. What cuisine would you like?"
 
     return clean
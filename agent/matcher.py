@@ -0,0 +1,78 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lower-cased keywords.
+
+    One pass over the text finds every keyword occurrence, independent of how
+    many keywords were compiled in. Matches only count on word boundaries.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for keyword, value in keywords.items():
+            self._add(keyword.lower(), value)
+        self._build()
+
+    def __len__(self):
+        return sum(len(out) for out in self._out)
+
+    def _add(self, keyword, value):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(keyword), keyword, value))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text):
+        text = text.lower()
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, keyword, value in self._out[state]:
+                start = i - length + 1
+                end = i + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum():
+                    continue
+                matches.append((start, end, keyword, value))
+        return matches
+
+    def longest_matches(self, text):
+        # Leftmost-longest, non-overlapping: "north indian" wins over "indian".
+        matches = sorted(self.find_all(text), key=lambda m: (m[0], -(m[1] - m[0])))
+        selected = []
+        last_end = -1
+        for match in matches:
+            if match[0] >= last_end:
+                selected.append(match)
+                last_end = match[1]
+        return selected
@@ -0,0 +1,79 @@
+import os
+import re
+import threading
+from collections import deque
+
+from agent.validation import ArgumentError, parse_arguments
+
+# Cheapest/fastest first; a turn only moves up when the answer fails validation.
+MODEL_TIERS = [
+    m.strip() for m in os.getenv(
+        "LLM_MODELS", "llama-3.1-8b-instant,llama-3.3-70b-versatile"
+    ).split(",") if m.strip()
+]
+
+LEAKED_TOOL_CALL_RE = re.compile(r"<function|/function|\b\w+_\w+\s*\{\s*\"")
+
+
+def is_tool_use_failure(error):
+    message = str(error)
+    return "tool_use_failed" in message or "tool call validation failed" in message
+
+
+def response_problem(content, tool_calls, tools):
+    """Why a model answer should be retried on a stronger model, or None."""
+    names = {tool["function"]["name"] for tool in tools or []}
+    for tool_call in tool_calls or []:
+        if tool_call.function.name not in names:
+            return "unknown_tool"
+        try:
+            parse_arguments(tool_call.function.arguments)
+        except ArgumentError:
+            return "unparsable_arguments"
+    if not tool_calls and content and LEAKED_TOOL_CALL_RE.search(content):
+        return "tool_call_in_text"
+    return None
+
+
+class ModelStats:
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._window = window
+        self._models = {}
+        self._reasons = {}
+
+    def _entry(self, model):
+        entry = self._models.get(model)
+        if entry is None:
+            entry = {"calls": 0, "failures": 0, "escalations": 0, "latencies": deque(maxlen=self._window)}
+            self._models[model] = entry
+        return entry
+
+    def record(self, model, seconds, ok=True):
+        with self._lock:
+            entry = self._entry(model)
+            entry["calls"] += 1
+            entry["latencies"].append(seconds)
+            if not ok:
+                entry["failures"] += 1
+
+    def escalate(self, model, reason):
+        with self._lock:
+            self._entry(model)["escalations"] += 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            models = {}
+            for model, entry in self._models.items():
+                latencies = sorted(entry["latencies"])
+                models[model] = {
+                    "calls": entry["calls"],
+                    "failures": entry["failures"],
+                    "escalations": entry["escalations"],
+                    "escalation_rate": entry["escalations"] / entry["calls"] if entry["calls"] else 0.0,
+                    "p50_s": latencies[len(latencies) // 2] if latencies else None,
+                    "p95_s": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else None
+                }
+            return {"models": models, "escalation_reasons": dict(self._reasons)}
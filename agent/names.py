@@ -0,0 +1,144 @@
+import math
+import re
+import unicodedata
+
+MATCH_THRESHOLD = 0.5
+CLEAR_WIN_MARGIN = 0.15
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_MIN_LENGTH = 3
+FUZZY_CANDIDATES = 3
+MAX_RESULTS = 5
+# Tokens with more postings than this (and than the candidates found so far
+# through rarer tokens) only re-rank those candidates.
+COMMON_POSTINGS = 256
+
+STOP_WORDS = {"the", "of", "and", "co", "e", "de", "la", "le"}
+QUERY_NOISE = {"book", "table", "reservation", "reserve", "a", "at", "for", "in", "please", "restaurant"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_tokens(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return _TOKEN_RE.findall(text.lower())
+
+
+def deletions(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Token postings plus a single-deletion index over the token vocabulary.
+
+    A misspelled query token finds vocabulary tokens that share a one
+    character deletion with it (insertions, deletions, substitutions and
+    transpositions), which are then ranked by trigram similarity. Names are
+    scored by how much of the query they cover (IDF weighted, with
+    trigram similarity for misspelled tokens) and, secondarily, by how much
+    of the name the query covers.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.postings = {}
+        self.exact = {}
+        self.name_tokens = []
+
+        for pos, name in enumerate(names):
+            tokens = normalize_tokens(name)
+            self.name_tokens.append(tokens)
+            self.exact.setdefault(" ".join(tokens), []).append(pos)
+            for token in set(tokens):
+                self.postings.setdefault(token, []).append(pos)
+
+        total = max(len(names), 1)
+        self.idf = {}
+        for token, positions in self.postings.items():
+            weight = math.log(1 + total / len(positions))
+            self.idf[token] = weight * 0.1 if token in STOP_WORDS else weight
+
+        self.name_weights = [sum(self.idf[t] for t in set(tokens)) for tokens in self.name_tokens]
+
+        self.deletion_index = {}
+        for token in self.postings:
+            if len(token) < FUZZY_MIN_LENGTH:
+                continue
+            for variant in deletions(token) | {token}:
+                self.deletion_index.setdefault(variant, []).append(token)
+
+    def _similar_tokens(self, token):
+        if token in self.postings:
+            return [(token, 1.0)]
+        if len(token) < FUZZY_MIN_LENGTH:
+            return []
+
+        candidates = set()
+        for variant in deletions(token) | {token}:
+            candidates.update(self.deletion_index.get(variant, ()))
+
+        grams = trigrams(token)
+        similar = []
+        for candidate in candidates:
+            other = trigrams(candidate)
+            similarity = 2 * len(grams & other) / (len(grams) + len(other))
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                similar.append((candidate, similarity))
+        similar.sort(key=lambda item: (-item[1], item[0]))
+        return similar[:FUZZY_CANDIDATES]
+
+    def query_tokens(self, query):
+        tokens = normalize_tokens(query)
+        return [t for t in tokens if t not in QUERY_NOISE or t in self.postings]
+
+    def lookup(self, query, limit=MAX_RESULTS):
+        """Return [(position, score)] best first; score is in [0, 1]."""
+        tokens = self.query_tokens(query)
+        if not tokens:
+            return []
+
+        exact = self.exact.get(" ".join(tokens))
+        if exact:
+            return [(pos, 1.0) for pos in exact[:limit]]
+        if all(t in STOP_WORDS for t in tokens):
+            return []
+
+        expanded = []
+        query_weight = 0.0
+        for token in dict.fromkeys(tokens):
+            similar = self._similar_tokens(token)
+            # Unknown tokens count against coverage as if they were rare.
+            weight = max((self.idf[t] for t, _ in similar), default=math.log(1 + len(self.names)))
+            query_weight += weight
+            if similar:
+                expanded.append((sum(len(self.postings[t]) for t, _ in similar), similar))
+        if not expanded:
+            return []
+
+        # Most selective tokens first, so common ones can fall back to re-ranking.
+        expanded.sort(key=lambda item: item[0])
+        matched = {}
+        for _, similar in expanded:
+            best = {}
+            for token, similarity in similar:
+                positions = self.postings[token]
+                if matched and len(positions) > max(COMMON_POSTINGS, len(matched)):
+                    positions = [p for p in matched if token in self.name_tokens[p]]
+                score = self.idf[token] * similarity
+                for pos in positions:
+                    if score > best.get(pos, 0.0):
+                        best[pos] = score
+            for pos, score in best.items():
+                matched[pos] = matched.get(pos, 0.0) + score
+
+        results = []
+        for pos, weight in matched.items():
+            query_cover = min(weight / query_weight, 1.0)
+            name_cover = min(weight / self.name_weights[pos], 1.0) if self.name_weights[pos] else 0.0
+            results.append((pos, round(0.7 * query_cover + 0.3 * name_cover, 3)))
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:limit]
@@ -1,30 +1,41 @@
-import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from agent import tools
+from agent.tracing import copy_context, count, span
+from agent.validation import VALIDATORS, ArgumentError, parse_arguments, validation_error
+
+# Tools touch SQLite and files; they run here so the event loop never blocks on them.
+_tool_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="tool")
 
 def execute_tool(tool_name, arguments):
 
-    if isinstance(arguments, str):
-        try:
-            arguments = json.loads(arguments)
-        except json.JSONDecodeError as e:
-            return {"error": f"Invalid JSON argument format: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Argument parsing error: {str(e)}"}
-    
-    if not isinstance(arguments, dict):
-        return {"error": "Arguments must be a dictionary/object"}
+    validator = VALIDATORS.get(tool_name)
+    if validator is None or not hasattr(tools, tool_name):
+        return {"error": f"Tool '{tool_name}' not found in available tools"}
 
     try:
-        func = getattr(tools, tool_name)
-    except AttributeError:
-        return {"error": f"Tool '{tool_name}' not found in available tools"}
+        arguments = parse_arguments(arguments)
+    except ArgumentError as e:
+        count("tool_invalid_arguments_total", tool=tool_name)
+        return validation_error(tool_name, [{"field": "arguments", "message": str(e)}])
+
+    arguments, errors = validator.validate(arguments)
+    if errors:
+        count("tool_invalid_arguments_total", tool=tool_name)
+        return validation_error(tool_name, errors)
 
     try:
-        result = func(**arguments)
+        with span("tool", tool=tool_name):
+            result = getattr(tools, tool_name)(**arguments)
         if result is None:
             return {"error": "Tool returned no result"}
         return result
-    except TypeError as e:
-        return {"error": f"Invalid arguments for tool '{tool_name}': {str(e)}"}
     except Exception as e:
         return {"error": f"Tool execution error in '{tool_name}': {str(e)}"}
+
+
+async def execute_tool_async(tool_name, arguments):
+    loop = asyncio.get_running_loop()
+    # Run inside a copy of this task's context so tool and storage spans land on the current turn.
+    return await loop.run_in_executor(_tool_executor, copy_context().run, execute_tool, tool_name, arguments)
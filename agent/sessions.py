@@ -0,0 +1,253 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Only the tail of a conversation is kept; window_history trims the prompt further.
+SESSION_HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", "40"))
+# Lease length of a session lock. The holder renews it every third of this
+# while its turn runs, so it only bounds how long a crashed worker blocks others.
+SESSION_LOCK_TTL = float(os.getenv("SESSION_LOCK_TTL", "60"))
+SESSION_LOCK_WAIT = float(os.getenv("SESSION_LOCK_WAIT", "30"))
+# The memory store forgets sessions idle this long (seconds), and the least
+# recently used ones beyond SESSION_MAX. 0 disables either limit.
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+
+
+class SessionBusy(Exception):
+    pass
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def _trim(history):
+    return history[-SESSION_HISTORY_LIMIT:] if SESSION_HISTORY_LIMIT else history
+
+
+class SessionStore(ABC):
+    """Chat history and booking state per session, plus a per-session lock.
+
+    A session is {"history": [...], "state": BookingState.to_dict()}.
+    """
+
+    @abstractmethod
+    def load(self, session_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, session_id, history, state):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def lock(self, session_id, wait=None):
+        """Context manager serializing turns of one session; raises SessionBusy on timeout."""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Single-process store; sessions are lost on restart.
+
+    Sessions are kept in LRU order and evicted once idle for `ttl` seconds or
+    beyond `max_sessions`. A lock entry only lives while a turn holds or waits
+    for it, so neither map grows with the number of sessions ever seen.
+    """
+
+    def __init__(self, ttl=None, max_sessions=None):
+        self.ttl = SESSION_TTL if ttl is None else ttl
+        self.max_sessions = SESSION_MAX if max_sessions is None else max_sessions
+        self._sessions = OrderedDict()  # session_id -> (last_used, session)
+        self._locks = {}  # session_id -> [lock, turns holding or waiting]
+        self._guard = threading.Lock()
+
+    def _evict(self, now):
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            expired = self.ttl and now - last_used > self.ttl
+            if not expired and not (self.max_sessions and len(self._sessions) > self.max_sessions):
+                break
+            del self._sessions[session_id]
+
+    def load(self, session_id):
+        now = time.monotonic()
+        with self._guard:
+            self._evict(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            session = entry[1]
+            self._sessions[session_id] = (now, session)
+            self._sessions.move_to_end(session_id)
+            return {"history": list(session["history"]), "state": dict(session["state"])}
+
+    def save(self, session_id, history, state):
+        now = time.monotonic()
+        with self._guard:
+            self._sessions[session_id] = (now, {"history": _trim(list(history)), "state": dict(state or {})})
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def delete(self, session_id):
+        # The lock stays: a turn may still hold it, and it goes away once released.
+        with self._guard:
+            return self._sessions.pop(session_id, None) is not None
+
+    @contextmanager
+    def lock(self, session_id, wait=None):
+        with self._guard:
+            entry = self._locks.setdefault(session_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            if not entry[0].acquire(timeout=SESSION_LOCK_WAIT if wait is None else wait):
+                raise SessionBusy(session_id)
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[session_id]
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in SQLite, shareable by several server processes on one host.
+
+    The per-session lock is a lease row: whoever inserts (or takes over an
+    expired) row owns the session until it deletes it, so two processes never
+    run turns of the same conversation at once. A background thread extends
+    every lease this process holds, so a long turn never loses its lock; only
+    a process that stopped renewing (crashed, hung) lets the lease expire.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._held = {}
+        self._held_lock = threading.Lock()
+        self._renewer = None
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " history TEXT NOT NULL,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_locks ("
+            " session_id TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._conn().execute(
+            "SELECT history, state FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"history": json.loads(row[0]), "state": json.loads(row[1])}
+
+    def save(self, session_id, history, state):
+        self._conn().execute(
+            "INSERT INTO sessions (session_id, history, state, updated_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(session_id) DO UPDATE SET"
+            " history = excluded.history, state = excluded.state, updated_at = excluded.updated_at",
+            (session_id, json.dumps(_trim(list(history))), json.dumps(state or {}), time.time())
+        )
+
+    def delete(self, session_id):
+        conn = self._conn()
+        conn.execute("DELETE FROM session_locks WHERE session_id = ?", (session_id,))
+        return conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def _try_acquire(self, session_id, owner):
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT INTO session_locks (session_id, owner, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(session_id) DO UPDATE SET"
+            " owner = excluded.owner, expires_at = excluded.expires_at"
+            " WHERE session_locks.expires_at < ?",
+            (session_id, owner, now + SESSION_LOCK_TTL, now)
+        )
+        return cursor.rowcount == 1
+
+    def _renew(self):
+        while True:
+            time.sleep(SESSION_LOCK_TTL / 3)
+            with self._held_lock:
+                held = list(self._held.items())
+            if not held:
+                continue
+            expires_at = time.time() + SESSION_LOCK_TTL
+            try:
+                conn = self._conn()
+                for session_id, owner in held:
+                    conn.execute(
+                        "UPDATE session_locks SET expires_at = ? WHERE session_id = ? AND owner = ?",
+                        (expires_at, session_id, owner)
+                    )
+            except sqlite3.Error:
+                continue  # Busy database; the next round retries well before expiry.
+
+    def _start_renewer(self):
+        with self._held_lock:
+            if self._renewer is None:
+                self._renewer = threading.Thread(target=self._renew, daemon=True, name="session-lease")
+                self._renewer.start()
+
+    @contextmanager
+    def lock(self, session_id, wait=None):
+        # Unique per acquisition so two threads of this process also exclude each other.
+        owner = f"{self._owner}-{threading.get_ident()}-{uuid.uuid4().hex[:8]}"
+        deadline = time.monotonic() + (SESSION_LOCK_WAIT if wait is None else wait)
+        delay = 0.005
+        while not self._try_acquire(session_id, owner):
+            if time.monotonic() >= deadline:
+                raise SessionBusy(session_id)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        self._start_renewer()
+        with self._held_lock:
+            self._held[session_id] = owner
+        try:
+            yield
+        finally:
+            with self._held_lock:
+                self._held.pop(session_id, None)
+            self._conn().execute(
+                "DELETE FROM session_locks WHERE session_id = ? AND owner = ?", (session_id, owner)
+            )
+
+
+def open_session_store(backend=None, path=None):
+    backend = backend or os.getenv("SESSION_BACKEND", "memory")
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore(path or os.getenv("SESSION_DB") or os.path.join(os.getcwd(), "data", "sessions.db"))
+    raise ValueError(f"Unknown session backend '{backend}'")
@@ -0,0 +1,892 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+
+from agent.availability import fits, normalize_reservation, overlap_window
+from agent.tracing import TRACING_ENABLED, span
+
+# date is ISO (YYYY-MM-DD), time is HH:MM for display and minute is the
+# minute of day used for every availability and conflict computation.
+RESERVATION_FIELDS = [
+    "user_name",
+    "restaurant_id",
+    "date",
+    "time",
+    "minute",
+    "guests",
+    "phone_number",
+    "created_at"
+]
+# Lookup keys derived from phone_number / user_name; never returned to callers.
+LOOKUP_COLUMNS = ["phone_key", "name_key"]
+
+
+def phone_key(phone_number):
+    # Last ten digits, so "+91-98765 43210" and "9876543210" find the same booking.
+    digits = "".join(ch for ch in str(phone_number or "") if ch.isdigit())
+    return digits[-10:] or None
+
+
+def name_key(user_name):
+    return " ".join(str(user_name or "").lower().split()) or None
+
+
+def _lookup_values(record):
+    return [phone_key(record.get("phone_number")), name_key(record.get("user_name"))]
+
+
+class ReservationStore(ABC):
+
+    @abstractmethod
+    def add(self, reservation):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, reservation_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, reservation_id, changes):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, reservation_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_slot(self, restaurant_id, date, start=None, end=None):
+        """Reservations on an ISO date whose minute falls in [start, end)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_date(self, date, restaurant_ids=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def all(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def normalize_records(self):
+        """Rewrite legacy rows to canonical date/minute form; returns (fixed, rejected)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def book(self, reservation, restaurant):
+        """Add the reservation only if its slot still has room, checked and written
+        atomically; returns the record, or None when the slot is full."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def rebook(self, reservation_id, changes, restaurant):
+        """Apply changes, re-checking capacity at the resulting slot atomically.
+
+        Returns (record, problem); problem is None, "not_found" or "full".
+        """
+        raise NotImplementedError
+
+    def changes_token(self):
+        """A value that changes when another process writes; None if no other process can."""
+        return None
+
+    @abstractmethod
+    def find(self, phone_number=None, user_name=None, restaurant_id=None, date=None,
+             from_date=None, limit=20):
+        """Bookings by exact phone and/or exact (normalized) full name, optionally
+        narrowed by restaurant and ISO date, ordered by date and time."""
+        raise NotImplementedError
+
+
+def _matches_lookup(r, phone, name, restaurant_id, date, from_date):
+    return (
+        (phone is None or phone_key(r.get("phone_number")) == phone)
+        and (name is None or name_key(r.get("user_name")) == name)
+        and (restaurant_id is None or r["restaurant_id"] == restaurant_id)
+        and (date is None or r["date"] == date)
+        and (from_date is None or r["date"] >= from_date)
+    )
+
+
+def _in_range(minute, start, end):
+    if minute is None:
+        return False
+    return (start is None or minute >= start) and (end is None or minute < end)
+
+
+def _has_room(restaurant, rows, record, exclude_id=None):
+    # rows: any superset of the reservations at the record's restaurant and date.
+    minute = record.get("minute")
+    if minute is None:
+        return True
+    start, end = overlap_window(minute)
+    neighbours = [
+        r for r in rows
+        if r["restaurant_id"] == record["restaurant_id"]
+        and r["date"] == record["date"]
+        and r["reservation_id"] != exclude_id
+        and _in_range(r.get("minute"), start, end)
+    ]
+    return fits(restaurant, neighbours, minute, record.get("guests"))
+
+
+class JSONReservationStore(ReservationStore):
+    """Legacy backend: the whole file is rewritten on every mutation."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _save(self, reservations):
+        tmp_path = self.path + ".tmp"
+        with span("storage_file_write", backend="json"):
+            with open(tmp_path, "w") as f:
+                json.dump(reservations, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def add(self, reservation):
+        with self._lock:
+            return self._append(self._load(), reservation)
+
+    def _append(self, reservations, reservation):
+        next_id = max((r["reservation_id"] for r in reservations), default=0) + 1
+        record = {"reservation_id": next_id, **reservation}
+        reservations.append(record)
+        self._save(reservations)
+        return record
+
+    def book(self, reservation, restaurant):
+        with self._lock:
+            reservations = self._load()
+            if not _has_room(restaurant, reservations, reservation):
+                return None
+            return self._append(reservations, reservation)
+
+    def rebook(self, reservation_id, changes, restaurant):
+        with self._lock:
+            reservations = self._load()
+            current = next((r for r in reservations if r["reservation_id"] == reservation_id), None)
+            if current is None:
+                return None, "not_found"
+            if restaurant is not None and not _has_room(
+                    restaurant, reservations, {**current, **changes}, exclude_id=reservation_id):
+                return current, "full"
+            current.update(changes)
+            self._save(reservations)
+            return current, None
+
+    def get(self, reservation_id):
+        for r in self._load():
+            if r["reservation_id"] == reservation_id:
+                return r
+        return None
+
+    def update(self, reservation_id, changes):
+        with self._lock:
+            reservations = self._load()
+            for r in reservations:
+                if r["reservation_id"] == reservation_id:
+                    r.update(changes)
+                    self._save(reservations)
+                    return r
+            return None
+
+    def delete(self, reservation_id):
+        with self._lock:
+            reservations = self._load()
+            removed = None
+            kept = []
+            for r in reservations:
+                if r["reservation_id"] == reservation_id and removed is None:
+                    removed = r
+                else:
+                    kept.append(r)
+            if removed is not None:
+                self._save(kept)
+            return removed
+
+    def find_slot(self, restaurant_id, date, start=None, end=None):
+        return [
+            r for r in self._load()
+            if r["restaurant_id"] == restaurant_id
+            and r["date"] == date
+            and _in_range(r.get("minute"), start, end)
+        ]
+
+    def find_date(self, date, restaurant_ids=None):
+        wanted = set(restaurant_ids) if restaurant_ids is not None else None
+        return [
+            r for r in self._load()
+            if r["date"] == date and (wanted is None or r["restaurant_id"] in wanted)
+        ]
+
+    def all(self):
+        return self._load()
+
+    def find(self, phone_number=None, user_name=None, restaurant_id=None, date=None,
+             from_date=None, limit=20):
+        phone, name = phone_key(phone_number), name_key(user_name)
+        found = [
+            r for r in self._load()
+            if _matches_lookup(r, phone, name, restaurant_id, date, from_date)
+        ]
+        found.sort(key=lambda r: (r["date"], r.get("minute") or 0))
+        return found[:limit]
+
+    def normalize_records(self):
+        with self._lock:
+            reservations = self._load()
+            kept = []
+            rejected = []
+            fixed = 0
+            for r in reservations:
+                clean, problem = normalize_reservation(r)
+                if problem:
+                    rejected.append({**r, "rejected_reason": problem})
+                    continue
+                fixed += clean != r
+                kept.append(clean)
+            if fixed or rejected:
+                if rejected:
+                    # Set aside rather than dropped, so placeholder rows can still be inspected.
+                    rejected_path = self.path + ".rejected.json"
+                    previous = []
+                    if os.path.exists(rejected_path):
+                        with open(rejected_path, "r") as f:
+                            previous = json.load(f)
+                    with open(rejected_path, "w") as f:
+                        json.dump(previous + rejected, f, indent=2)
+                self._save(kept)
+            return fixed, len(rejected)
+
+
+class SQLiteReservationStore(ReservationStore):
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._init_schema()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the database write lock up front, so a
+        # read-check-write inside one transaction is atomic across processes.
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('write_seq', 1)"
+                " ON CONFLICT(key) DO UPDATE SET value = value + 1"
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def changes_token(self):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'write_seq'").fetchone()
+        return row[0] if row else None
+
+    def _init_schema(self):
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reservations ("
+                " reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " user_name TEXT,"
+                " restaurant_id INTEGER,"
+                " date TEXT,"
+                " time TEXT,"
+                " minute INTEGER,"
+                " guests INTEGER,"
+                " phone_number TEXT,"
+                " created_at TEXT)"
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(reservations)")}
+            if "minute" not in columns:
+                conn.execute("ALTER TABLE reservations ADD COLUMN minute INTEGER")
+            if "phone_key" not in columns:
+                conn.execute("ALTER TABLE reservations ADD COLUMN phone_key TEXT")
+                conn.execute("ALTER TABLE reservations ADD COLUMN name_key TEXT")
+                rows = conn.execute("SELECT reservation_id, phone_number, user_name FROM reservations").fetchall()
+                conn.executemany(
+                    "UPDATE reservations SET phone_key = ?, name_key = ? WHERE reservation_id = ?",
+                    [(*_lookup_values(dict(r)), r["reservation_id"]) for r in rows]
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reservations_phone ON reservations (phone_key, date)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reservations_name ON reservations (name_key, date)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reservations_date ON reservations (date)"
+            )
+            conn.execute("DROP INDEX IF EXISTS idx_reservations_slot")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reservations_minute"
+                " ON reservations (restaurant_id, date, minute)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reservations_rejected ("
+                " reservation_id INTEGER, record TEXT, reason TEXT)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @staticmethod
+    def _row_to_dict(row):
+        if row is None:
+            return None
+        return {k: row[k] for k in row.keys() if row[k] is not None and k not in LOOKUP_COLUMNS}
+
+    @staticmethod
+    def _insert(conn, reservation):
+        columns = RESERVATION_FIELDS + LOOKUP_COLUMNS
+        values = [reservation.get(f) for f in RESERVATION_FIELDS] + _lookup_values(reservation)
+        # AUTOINCREMENT never hands out an id twice, even after deletes.
+        cur = conn.execute(
+            f"INSERT INTO reservations ({', '.join(columns)})"
+            f" VALUES ({', '.join('?' for _ in columns)})",
+            values
+        )
+        return {"reservation_id": cur.lastrowid, **reservation}
+
+    def _window_rows(self, conn, record):
+        start, end = overlap_window(record["minute"])
+        rows = conn.execute(
+            "SELECT reservation_id, restaurant_id, date, minute, guests FROM reservations"
+            " WHERE restaurant_id = ? AND date = ? AND minute >= ? AND minute < ?",
+            (record["restaurant_id"], record["date"], start, end)
+        )
+        return [dict(r) for r in rows]
+
+    def add(self, reservation):
+        with self._transaction() as conn:
+            return self._insert(conn, reservation)
+
+    def book(self, reservation, restaurant):
+        with self._transaction() as conn:
+            if reservation.get("minute") is not None and not _has_room(
+                    restaurant, self._window_rows(conn, reservation), reservation):
+                return None
+            return self._insert(conn, reservation)
+
+    def rebook(self, reservation_id, changes, restaurant):
+        changes = {k: v for k, v in changes.items() if k in RESERVATION_FIELDS}
+        with self._transaction() as conn:
+            current = self._row_to_dict(conn.execute(
+                "SELECT * FROM reservations WHERE reservation_id = ?", (reservation_id,)
+            ).fetchone())
+            if current is None:
+                return None, "not_found"
+            updated = {**current, **changes}
+            if restaurant is not None and updated.get("minute") is not None and not _has_room(
+                    restaurant, self._window_rows(conn, updated), updated, exclude_id=reservation_id):
+                return current, "full"
+            if changes:
+                assignments = ", ".join(f"{k} = ?" for k in changes)
+                conn.execute(
+                    f"UPDATE reservations SET {assignments} WHERE reservation_id = ?",
+                    [*changes.values(), reservation_id]
+                )
+        return updated, None
+
+    def get(self, reservation_id):
+        row = self._conn().execute(
+            "SELECT * FROM reservations WHERE reservation_id = ?", (reservation_id,)
+        ).fetchone()
+        return self._row_to_dict(row)
+
+    def update(self, reservation_id, changes):
+        changes = {k: v for k, v in changes.items() if k in RESERVATION_FIELDS}
+        if "phone_number" in changes:
+            changes["phone_key"] = phone_key(changes["phone_number"])
+        if "user_name" in changes:
+            changes["name_key"] = name_key(changes["user_name"])
+        with self._transaction() as conn:
+            if changes:
+                assignments = ", ".join(f"{k} = ?" for k in changes)
+                conn.execute(
+                    f"UPDATE reservations SET {assignments} WHERE reservation_id = ?",
+                    [*changes.values(), reservation_id]
+                )
+            row = conn.execute(
+                "SELECT * FROM reservations WHERE reservation_id = ?", (reservation_id,)
+            ).fetchone()
+        return self._row_to_dict(row)
+
+    def delete(self, reservation_id):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM reservations WHERE reservation_id = ?", (reservation_id,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM reservations WHERE reservation_id = ?", (reservation_id,))
+        return self._row_to_dict(row)
+
+    def find_slot(self, restaurant_id, date, start=None, end=None):
+        rows = self._conn().execute(
+            "SELECT * FROM reservations WHERE restaurant_id = ? AND date = ?"
+            " AND minute >= ? AND minute < ?",
+            (restaurant_id, date, 0 if start is None else start, 24 * 60 if end is None else end)
+        )
+        return [self._row_to_dict(r) for r in rows]
+
+    def find_date(self, date, restaurant_ids=None):
+        if restaurant_ids is None:
+            rows = self._conn().execute("SELECT * FROM reservations WHERE date = ?", (date,))
+            return [self._row_to_dict(r) for r in rows]
+
+        results = []
+        restaurant_ids = list(restaurant_ids)
+        # Stay under SQLite's bound-parameter limit for large candidate lists.
+        for start in range(0, len(restaurant_ids), 500):
+            chunk = restaurant_ids[start:start + 500]
+            rows = self._conn().execute(
+                f"SELECT * FROM reservations WHERE date = ? AND restaurant_id IN ({', '.join('?' for _ in chunk)})",
+                [date, *chunk]
+            )
+            results.extend(self._row_to_dict(r) for r in rows)
+        return results
+
+    def all(self):
+        rows = self._conn().execute("SELECT * FROM reservations ORDER BY reservation_id")
+        return [self._row_to_dict(r) for r in rows]
+
+    def find(self, phone_number=None, user_name=None, restaurant_id=None, date=None,
+             from_date=None, limit=20):
+        clauses, params = [], []
+        phone, name = phone_key(phone_number), name_key(user_name)
+        if phone:
+            clauses.append("phone_key = ?")
+            params.append(phone)
+        if name:
+            clauses.append("name_key = ?")
+            params.append(name)
+        if restaurant_id is not None:
+            clauses.append("restaurant_id = ?")
+            params.append(restaurant_id)
+        if date:
+            clauses.append("date = ?")
+            params.append(date)
+        if from_date:
+            clauses.append("date >= ?")
+            params.append(from_date)
+        where = " AND ".join(clauses) or "1"
+        rows = self._conn().execute(
+            f"SELECT * FROM reservations WHERE {where} ORDER BY date, minute LIMIT ?",
+            [*params, limit]
+        )
+        return [self._row_to_dict(r) for r in rows]
+
+    def migrate_from_json(self, json_path):
+        if not os.path.exists(json_path):
+            return 0
+
+        with self._transaction() as conn:
+            done = conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated_from_json'"
+            ).fetchone()
+            if done is not None:
+                return 0
+
+            with open(json_path, "r") as f:
+                reservations = json.load(f)
+
+            columns = ", ".join(RESERVATION_FIELDS + LOOKUP_COLUMNS)
+            placeholders = ", ".join("?" for _ in RESERVATION_FIELDS + LOOKUP_COLUMNS)
+            migrated = 0
+            for r in reservations:
+                values = [r.get(f) for f in RESERVATION_FIELDS] + _lookup_values(r)
+                cur = conn.execute(
+                    f"INSERT OR IGNORE INTO reservations (reservation_id, {columns}) VALUES (?, {placeholders})",
+                    [r.get("reservation_id"), *values]
+                )
+                if cur.rowcount == 0:
+                    # The old len()+1 allocator could reuse ids; keep the row under a fresh one.
+                    conn.execute(f"INSERT INTO reservations ({columns}) VALUES ({placeholders})", values)
+                migrated += 1
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                (json_path,)
+            )
+        return migrated
+
+    def normalize_records(self):
+        with self._transaction() as conn:
+            if conn.execute("SELECT value FROM meta WHERE key = 'normalized_v1'").fetchone():
+                return 0, 0
+
+            fixed = rejected = 0
+            for row in conn.execute("SELECT * FROM reservations").fetchall():
+                record = self._row_to_dict(row)
+                clean, problem = normalize_reservation(record)
+                if problem:
+                    conn.execute(
+                        "INSERT INTO reservations_rejected (reservation_id, record, reason) VALUES (?, ?, ?)",
+                        (record["reservation_id"], json.dumps(record), problem)
+                    )
+                    conn.execute("DELETE FROM reservations WHERE reservation_id = ?", (record["reservation_id"],))
+                    rejected += 1
+                elif clean != record:
+                    conn.execute(
+                        "UPDATE reservations SET date = ?, time = ?, minute = ? WHERE reservation_id = ?",
+                        (clean["date"], clean["time"], clean["minute"], record["reservation_id"])
+                    )
+                    fixed += 1
+            conn.execute("INSERT INTO meta (key, value) VALUES ('normalized_v1', ?)", (f"{fixed}/{rejected}",))
+        return fixed, rejected
+
+
+class EventLogReservationStore(ReservationStore):
+    """Append-only JSONL log of create/update/cancel events plus an in-memory view.
+
+    Every mutation appends one fsynced line, so a write costs O(1) however
+    many reservations exist and a crash can at worst leave a torn last line,
+    which is ignored on replay. Every compact_every events the view is written
+    to a snapshot and the log is rotated (kept as <log>.<seq> for auditing);
+    startup loads the snapshot and replays only the log tail.
+    """
+
+    def __init__(self, log_path, snapshot_path=None, compact_every=None):
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path or log_path + ".snapshot"
+        self.compact_every = (
+            int(os.getenv("RESERVATION_LOG_COMPACT_EVERY", "1000"))
+            if compact_every is None else compact_every
+        )
+        self._lock = threading.RLock()
+        self._rows = {}
+        self._by_slot = {}
+        self._by_phone = {}
+        self._by_name = {}
+        self._seq = 0
+        self._next_id = 1
+        self._since_snapshot = 0
+        self._load()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+
+    # -- view maintenance -------------------------------------------------
+
+    def _index(self, r):
+        self._by_slot.setdefault((r["restaurant_id"], r["date"]), set()).add(r["reservation_id"])
+        phone = phone_key(r.get("phone_number"))
+        if phone:
+            self._by_phone.setdefault(phone, set()).add(r["reservation_id"])
+        name = name_key(r.get("user_name"))
+        if name:
+            self._by_name.setdefault(name, set()).add(r["reservation_id"])
+
+    def _unindex(self, r):
+        self._by_slot.get((r["restaurant_id"], r["date"]), set()).discard(r["reservation_id"])
+        phone = phone_key(r.get("phone_number"))
+        if phone:
+            self._by_phone.get(phone, set()).discard(r["reservation_id"])
+        name = name_key(r.get("user_name"))
+        if name:
+            self._by_name.get(name, set()).discard(r["reservation_id"])
+
+    def _apply(self, event):
+        kind = event["type"]
+        reservation_id = event["reservation_id"]
+        current = self._rows.get(reservation_id)
+        if kind == "create":
+            record = {"reservation_id": reservation_id, **event["data"]}
+            self._rows[reservation_id] = record
+            self._index(record)
+            self._next_id = max(self._next_id, reservation_id + 1)
+        elif kind == "update" and current is not None:
+            self._unindex(current)
+            current.update(event["changes"])
+            self._index(current)
+        elif kind == "cancel" and current is not None:
+            self._unindex(current)
+            del self._rows[reservation_id]
+        self._seq = event["seq"]
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            for record in snapshot["reservations"]:
+                self._rows[record["reservation_id"]] = record
+                self._index(record)
+            self._seq = snapshot["seq"]
+            self._next_id = snapshot["next_id"]
+
+        if not os.path.exists(self.log_path):
+            return
+        valid_bytes = 0
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash; everything after it is discarded.
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_bytes += len(line)
+                if event["seq"] > self._seq:
+                    self._apply(event)
+                    self._since_snapshot += 1
+        if valid_bytes < os.path.getsize(self.log_path):
+            with open(self.log_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    # -- writes -----------------------------------------------------------
+
+    def _append(self, kind, reservation_id, **payload):
+        event = {
+            "seq": self._seq + 1,
+            "type": kind,
+            "reservation_id": reservation_id,
+            "at": datetime.now().isoformat(),
+            **payload
+        }
+        self._log.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._apply(event)
+        self._since_snapshot += 1
+        if self.compact_every and self._since_snapshot >= self.compact_every:
+            self.compact()
+        return event
+
+    def add(self, reservation):
+        with self._lock:
+            reservation_id = self._next_id
+            self._append("create", reservation_id, data=dict(reservation))
+            return dict(self._rows[reservation_id])
+
+    def update(self, reservation_id, changes):
+        changes = {k: v for k, v in changes.items() if k in RESERVATION_FIELDS}
+        with self._lock:
+            if reservation_id not in self._rows:
+                return None
+            if changes:
+                self._append("update", reservation_id, changes=changes)
+            return dict(self._rows[reservation_id])
+
+    def book(self, reservation, restaurant):
+        with self._lock:
+            rows = [self._rows[i] for i in self._by_slot.get((reservation["restaurant_id"], reservation["date"]), ())]
+            if not _has_room(restaurant, rows, reservation):
+                return None
+            return self.add(reservation)
+
+    def rebook(self, reservation_id, changes, restaurant):
+        with self._lock:
+            current = self._rows.get(reservation_id)
+            if current is None:
+                return None, "not_found"
+            updated = {**current, **changes}
+            rows = [self._rows[i] for i in self._by_slot.get((updated["restaurant_id"], updated["date"]), ())]
+            if restaurant is not None and not _has_room(restaurant, rows, updated, exclude_id=reservation_id):
+                return dict(current), "full"
+            return self.update(reservation_id, changes), None
+
+    def delete(self, reservation_id, reason=None):
+        with self._lock:
+            current = self._rows.get(reservation_id)
+            if current is None:
+                return None
+            removed = dict(current)
+            self._append("cancel", reservation_id, **({"reason": reason} if reason else {}))
+            return removed
+
+    def compact(self):
+        with self._lock:
+            snapshot = {
+                "seq": self._seq,
+                "next_id": self._next_id,
+                "reservations": sorted(self._rows.values(), key=lambda r: r["reservation_id"])
+            }
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # The snapshot covers every event so far; replay skips seq <= snapshot seq
+            # even if we crash before the rotation below.
+            self._log.close()
+            if os.path.getsize(self.log_path):
+                os.replace(self.log_path, f"{self.log_path}.{self._seq}")
+            self._log = open(self.log_path, "a", encoding="utf-8")
+            self._since_snapshot = 0
+
+    # -- reads ------------------------------------------------------------
+
+    def get(self, reservation_id):
+        with self._lock:
+            record = self._rows.get(reservation_id)
+            return dict(record) if record else None
+
+    def find_slot(self, restaurant_id, date, start=None, end=None):
+        with self._lock:
+            ids = self._by_slot.get((restaurant_id, date), ())
+            return [
+                dict(self._rows[i]) for i in sorted(ids)
+                if _in_range(self._rows[i].get("minute"), start, end)
+            ]
+
+    def find_date(self, date, restaurant_ids=None):
+        with self._lock:
+            if restaurant_ids is None:
+                keys = [k for k in self._by_slot if k[1] == date]
+            else:
+                keys = [(rid, date) for rid in restaurant_ids]
+            ids = set()
+            for key in keys:
+                ids.update(self._by_slot.get(key, ()))
+            return [dict(self._rows[i]) for i in sorted(ids)]
+
+    def find(self, phone_number=None, user_name=None, restaurant_id=None, date=None,
+             from_date=None, limit=20):
+        phone, name = phone_key(phone_number), name_key(user_name)
+        with self._lock:
+            if phone:
+                ids = self._by_phone.get(phone, set())
+            elif name:
+                ids = self._by_name.get(name, set())
+            else:
+                ids = self._rows.keys()
+            found = [
+                dict(self._rows[i]) for i in ids
+                if _matches_lookup(self._rows[i], phone, name, restaurant_id, date, from_date)
+            ]
+        found.sort(key=lambda r: (r["date"], r.get("minute") or 0))
+        return found[:limit]
+
+    def all(self):
+        with self._lock:
+            return [dict(self._rows[i]) for i in sorted(self._rows)]
+
+    # -- migration --------------------------------------------------------
+
+    def migrate_from_json(self, json_path):
+        with self._lock:
+            if self._seq or not os.path.exists(json_path):
+                return 0
+            with open(json_path, "r") as f:
+                reservations = json.load(f)
+            for r in reservations:
+                record = {k: r[k] for k in RESERVATION_FIELDS if k in r}
+                self._append("create", self._next_id, data=record, legacy_id=r.get("reservation_id"))
+            return len(reservations)
+
+    def normalize_records(self):
+        with self._lock:
+            fixed = rejected = 0
+            for record in self.all():
+                clean, problem = normalize_reservation(record)
+                if problem:
+                    self.delete(record["reservation_id"], reason=f"rejected: {problem}")
+                    rejected += 1
+                elif clean != record:
+                    changes = {k: v for k, v in clean.items() if record.get(k) != v}
+                    self._append("update", record["reservation_id"], changes=changes)
+                    fixed += 1
+            return fixed, rejected
+
+
+class TracedReservationStore:
+    """Times every store call into storage_seconds{backend, op}; everything else passes through."""
+
+    OPERATIONS = {"add", "book", "rebook", "get", "update", "delete", "find_slot", "find_date", "all", "find"}
+
+    def __init__(self, store, backend):
+        self.store = store
+        self.backend = backend
+
+    def __getattr__(self, name):
+        attr = getattr(self.store, name)
+        if name not in self.OPERATIONS:
+            return attr
+
+        def traced(*args, **kwargs):
+            with span("storage", backend=self.backend, op=name):
+                return attr(*args, **kwargs)
+        return traced
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+_process_locks = []
+
+
+def _claim_single_process(path):
+    """Fail fast if another process already serves this file-backed store.
+
+    The json and eventlog backends keep their consistency guarantees (ids,
+    capacity checks, the in-memory view) inside one process only; run
+    several processes against the sqlite backend instead.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return  # No flock on this platform; single-process use is documented only.
+    handle = open(path + ".lock", "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        raise RuntimeError(
+            f"{path} is already in use by another process; the json and eventlog"
+            " reservation backends are single-process, use RESERVATION_BACKEND=sqlite"
+        )
+    _process_locks.append(handle)
+
+
+def open_store(backend, json_path, db_path):
+    key = (backend, json_path, db_path)
+    store = _stores.get(key)
+    if store is not None:
+        return store
+
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is not None:
+            return store
+
+        if backend == "json":
+            _claim_single_process(json_path)
+            store = JSONReservationStore(json_path)
+        elif backend == "sqlite":
+            store = SQLiteReservationStore(db_path)
+            store.migrate_from_json(json_path)
+        elif backend == "eventlog":
+            log_path = os.path.splitext(json_path)[0] + ".log.jsonl"
+            _claim_single_process(log_path)
+            store = EventLogReservationStore(log_path)
+            store.migrate_from_json(json_path)
+        else:
+            raise ValueError(f"Unknown reservation backend '{backend}'")
+        store.normalize_records()
+        if TRACING_ENABLED:
+            store = TracedReservationStore(store, backend)
+
+        _stores[key] = store
+        return store
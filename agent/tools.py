@@ -1,191 +1,238 @@
-import json
 import os
-from datetime import datetime
+from datetime import date as Date, datetime
+
+from agent.availability import format_time, get_engine, iso_date, parse_time, tables_needed
+from agent.catalog import get_catalog
+from agent.names import CLEAR_WIN_MARGIN, MATCH_THRESHOLD
+from agent.storage import open_store
 
 DATA_DIR = os.path.join(os.getcwd(), "data")
 RESTAURANTS_FILE = os.path.join(DATA_DIR, "restaurants.json")
 RESERVATIONS_FILE = os.path.join(DATA_DIR, "reservations.json")
+RESERVATIONS_DB = os.path.join(DATA_DIR, "reservations.db")
+RESERVATION_BACKEND = os.getenv("RESERVATION_BACKEND", "sqlite")
+RESERVATION_LOOKUP_LIMIT = 10
 
-def load_json(path):
-    if not os.path.exists(path):
-        return []
-    with open(path, "r") as f:
-        return json.load(f)
-
-def save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
+def get_reservation_store():
+    return open_store(RESERVATION_BACKEND, RESERVATIONS_FILE, RESERVATIONS_DB)
 
-def normalize(text):
-    return text.lower().strip() if text else None
+def get_availability_engine():
+    return get_engine(get_reservation_store())
 
 def search_restaurants(cuisine=None, location=None, guests=None):
-    restaurants = load_json(RESTAURANTS_FILE)
-    results = []
+    catalog = get_catalog(RESTAURANTS_FILE)
+    return {"restaurants": catalog.search(cuisine=cuisine, location=location, guests=guests)}
 
-    cuisine = normalize(cuisine)
-    location = normalize(location)
+def recommend_restaurants(cuisine, guests):
+    catalog = get_catalog(RESTAURANTS_FILE)
+    return {"results": catalog.recommend(cuisine, guests)}
 
-    for r in restaurants:
-        rc = normalize(r["cuisine"])
-        rl = normalize(r["location"])
+def check_availability(restaurant_id, date, time, guests=None):
+    day = iso_date(date)
+    if day is None:
+        return {"available": False, "error": "Invalid date format. Please use dd-mm-yyyy"}
+
+    minutes = parse_time(time)
+    if minutes is None:
+        return {"available": False, "error": "Invalid time format. Please use HH:MM or a time like 7 PM"}
 
-        if cuisine and cuisine not in rc:
-            continue
-        if location and location not in rl:
-            continue
-        if guests and r["seating_capacity"] < guests:
-            continue
+    restaurant = get_catalog(RESTAURANTS_FILE).get(restaurant_id)
+    if not restaurant:
+        return {"available": False}
 
+    tables_left = get_availability_engine().tables_left(restaurant, day, minutes)
+    return {
+        "available": tables_left >= tables_needed(restaurant, guests),
+        "tables_left": tables_left
+    }
+
+def check_availability_bulk(date, times, restaurant_ids=None, cuisine=None, location=None, guests=None):
+    day = iso_date(date)
+    if day is None:
+        return {"success": False, "error": "Invalid date format. Please use dd-mm-yyyy"}
+
+    if isinstance(times, str):
+        times = [times]
+    if not times:
+        return {"success": False, "error": "At least one time is required"}
+
+    slots = [parse_time(t) for t in times]
+    invalid = [t for t, m in zip(times, slots) if m is None]
+    if invalid:
+        return {"success": False, "error": f"Invalid time format: {', '.join(map(str, invalid))}"}
+
+    catalog = get_catalog(RESTAURANTS_FILE)
+    if restaurant_ids:
+        restaurants = [catalog.get(rid) for rid in restaurant_ids]
+        restaurants = [r for r in restaurants if r]
+    elif cuisine or location:
+        restaurants = [catalog.get(r["id"]) for r in catalog.search(cuisine=cuisine, location=location, guests=guests)]
+    else:
+        return {"success": False, "error": "Provide restaurant_ids or a cuisine/location filter"}
+
+    left_by_id = get_availability_engine().tables_left_many(restaurants, day, slots)
+    results = []
+    for r in restaurants:
+        needed = tables_needed(r, guests)
+        tables_left = left_by_id[r["id"]]
         results.append({
             "id": r["id"],
             "name": r["name"],
             "cuisine": r["cuisine"],
-            "rating": r["rating"],
             "location": r["location"],
-            "available_tables": r["available_tables"]
+            "availability": [left >= needed for left in tables_left],
+            "tables_left": tables_left
         })
 
-    return {"restaurants": results}
-
-def recommend_restaurants(cuisine, guests):
-    restaurants = load_json(RESTAURANTS_FILE)
-    results = []
-
-    cuisine = normalize(cuisine)
-
-    for r in restaurants:
-        if (normalize(r["cuisine"]) == cuisine
-            and r["available_tables"] > 0
-            and r["seating_capacity"] >= guests):
-            results.append(r)
-
-    results.sort(key=lambda x: x["rating"], reverse=True)
-    return {"results": results[:5]}
-
-def check_availability(restaurant_id, date, time):
-    try:
-        datetime.strptime(date, "%d-%m-%Y")
-    except ValueError:
-        return {"available": False, "error": "Invalid date format. Please use dd-mm-yyyy"}
-    
-    reservations = load_json(RESERVATIONS_FILE)
-    time = time.lower().replace(" ", "")
-
-    for r in reservations:
-        rt = r["time"].lower().replace(" ", "")
-        if r["restaurant_id"] == restaurant_id and r["date"] == date and rt == time:
-            return {"available": False}
-
-    restaurants = load_json(RESTAURANTS_FILE)
-    for r in restaurants:
-        if r["id"] == restaurant_id and r["available_tables"] > 0:
-            return {"available": True}
-
-    return {"available": False}
+    return {"success": True, "date": date, "times": times, "results": results}
 
 def create_reservation(user_name, restaurant_id, date, time, guests, phone_number):
     if not all([user_name, restaurant_id, date, time, guests, phone_number]):
         return {"success": False, "error": "Missing required booking information"}
     
-    try:
-        datetime.strptime(date, "%d-%m-%Y")
-    except ValueError:
+    day = iso_date(date)
+    if day is None:
         return {"success": False, "error": "Invalid date format. Please use dd-mm-yyyy format"}
-    
-    reservations = load_json(RESERVATIONS_FILE)
-    reservation_id = len(reservations) + 1
 
-    new_res = {
-        "reservation_id": reservation_id,
+    minutes = parse_time(time)
+    if minutes is None:
+        return {"success": False, "error": "Invalid time format. Please use HH:MM or a time like 7 PM"}
+
+    restaurant = get_catalog(RESTAURANTS_FILE).get(restaurant_id)
+    if not restaurant:
+        return {"success": False, "error": "Restaurant not found"}
+
+    new_res = get_reservation_store().book({
         "user_name": user_name,
         "restaurant_id": restaurant_id,
-        "date": date,
-        "time": time,
+        "date": day,
+        "time": format_time(minutes),
+        "minute": minutes,
         "guests": guests,
         "phone_number": phone_number,
         "created_at": datetime.now().isoformat()
-    }
-
-    reservations.append(new_res)
-    save_json(RESERVATIONS_FILE, reservations)
+    }, restaurant)
+    if new_res is None:
+        return {"success": False, "error": "No table available at that time"}
+    get_availability_engine().invalidate(restaurant_id, day)
 
     return {"success": True, "reservation": new_res}
 
 def cancel_reservation(reservation_id):
-    reservations = load_json(RESERVATIONS_FILE)
-    updated = [r for r in reservations if r["reservation_id"] != reservation_id]
-
-    if len(updated) == len(reservations):
+    removed = get_reservation_store().delete(reservation_id)
+    if removed is None:
         return {"success": False, "message": "Reservation not found"}
-
-    save_json(RESERVATIONS_FILE, updated)
+    get_availability_engine().invalidate(removed["restaurant_id"], removed["date"])
     return {"success": True}
 
 def update_reservation(reservation_id, date=None, time=None, guests=None):
-    reservations = load_json(RESERVATIONS_FILE)
+    changes = {}
+    if date:
+        day = iso_date(date)
+        if day is None:
+            return {"success": False, "message": "Invalid date format. Please use dd-mm-yyyy"}
+        changes["date"] = day
+    if time:
+        minutes = parse_time(time)
+        if minutes is None:
+            return {"success": False, "message": "Invalid time format. Please use HH:MM or a time like 7 PM"}
+        changes["time"] = format_time(minutes)
+        changes["minute"] = minutes
+    if guests:
+        changes["guests"] = guests
+
+    store = get_reservation_store()
+    current = store.get(reservation_id)
+    if current is None:
+        return {"success": False, "message": "Reservation not found"}
 
-    for r in reservations:
-        if r["reservation_id"] == reservation_id:
-            if date:
-                r["date"] = date
-            if time:
-                r["time"] = time
-            if guests:
-                r["guests"] = guests
+    # The store re-reads the row and re-checks capacity inside its write transaction.
+    restaurant = get_catalog(RESTAURANTS_FILE).get(current["restaurant_id"])
+    updated, problem = store.rebook(reservation_id, changes, restaurant)
+    if problem == "not_found":
+        return {"success": False, "message": "Reservation not found"}
+    if problem == "full":
+        return {"success": False, "message": "No table available at that time"}
 
-            save_json(RESERVATIONS_FILE, reservations)
-            return {"success": True}
+    engine = get_availability_engine()
+    engine.invalidate(current["restaurant_id"], current["date"])
+    engine.invalidate(updated["restaurant_id"], updated["date"])
+    return {"success": True}
 
-    return {"success": False, "message": "Reservation not found"}
+def find_reservations(phone_number=None, user_name=None, restaurant_id=None, date=None, include_past=False):
+    # Lookups are keyed on the guest, never on restaurant/date alone, so one
+    # caller cannot list everybody else's bookings. A name alone is too easy
+    # to guess, so it has to be the exact full name plus the phone or date.
+    if not phone_number and not (user_name and date):
+        return {
+            "success": False,
+            "error": "Provide the phone number used for the booking, or the full name and the booking date"
+        }
+
+    day = None
+    if date:
+        day = iso_date(date)
+        if day is None:
+            return {"success": False, "error": "Invalid date format. Please use dd-mm-yyyy"}
+
+    found = get_reservation_store().find(
+        phone_number=phone_number,
+        user_name=user_name,
+        restaurant_id=restaurant_id,
+        date=day,
+        from_date=None if include_past or day else Date.today().isoformat(),
+        limit=RESERVATION_LOOKUP_LIMIT
+    )
+
+    catalog = get_catalog(RESTAURANTS_FILE)
+    reservations = []
+    for r in found:
+        restaurant = catalog.get(r["restaurant_id"])
+        reservations.append({
+            "reservation_id": r["reservation_id"],
+            "restaurant_id": r["restaurant_id"],
+            "restaurant_name": restaurant["name"] if restaurant else None,
+            "date": r["date"],
+            "time": r.get("time"),
+            "guests": r.get("guests"),
+            "user_name": r.get("user_name")
+        })
+    return {"success": True, "reservations": reservations}
 
 def find_restaurant_by_name(restaurant_name):
-    restaurants = load_json(RESTAURANTS_FILE)
-    
-    search_name = restaurant_name.lower().strip()
-    search_name = search_name.replace("book", "").replace("table", "").replace("reservation", "").strip()
-    
-    matches = []
-    exact_matches = []
-    
-    for r in restaurants:
-        restaurant_name_lower = r["name"].lower()
-        
-        if search_name == restaurant_name_lower:
-            exact_matches.append({
-                "id": r["id"],
-                "name": r["name"],
-                "cuisine": r["cuisine"],
-                "location": r["location"]
-            })
-        elif (search_name in restaurant_name_lower or 
-              any(word in restaurant_name_lower for word in search_name.split() if len(word) > 2)):
-            matches.append({
-                "id": r["id"],
-                "name": r["name"],
-                "cuisine": r["cuisine"],
-                "location": r["location"]
-            })
-    
-    if exact_matches:
-        if len(exact_matches) == 1:
-            return {"success": True, "restaurant": exact_matches[0]}
-        else:
-            return {"success": False, "message": "Multiple exact matches found", "matches": exact_matches}
-    
-    if len(matches) == 1:
-        return {"success": True, "restaurant": matches[0]}
-    elif len(matches) > 1:
-        return {"success": False, "message": "Multiple restaurants found", "matches": matches}
-    else:
+    ranked = get_catalog(RESTAURANTS_FILE).find_by_name(restaurant_name)
+
+    matches = [
+        {
+            "id": r["id"],
+            "name": r["name"],
+            "cuisine": r["cuisine"],
+            "location": r["location"],
+            "confidence": score
+        }
+        for r, score in ranked if score >= MATCH_THRESHOLD
+    ]
+
+    if not matches:
         return {"success": False, "message": "No restaurant found with that name"}
 
+    exact_matches = [m for m in matches if m["confidence"] == 1.0]
+    if len(exact_matches) > 1:
+        return {"success": False, "message": "Multiple exact matches found", "matches": exact_matches}
+
+    best = matches[0]
+    if len(matches) == 1 or best["confidence"] - matches[1]["confidence"] >= CLEAR_WIN_MARGIN:
+        return {"success": True, "restaurant": best, "confidence": best["confidence"]}
+    return {"success": False, "message": "Multiple restaurants found", "matches": matches}
+
 AVAILABLE_TOOLS = {
     "search_restaurants": search_restaurants,
     "recommend_restaurants": recommend_restaurants,
     "check_availability": check_availability,
+    "check_availability_bulk": check_availability_bulk,
     "create_reservation": create_reservation,
     "cancel_reservation": cancel_reservation,
     "update_reservation": update_reservation,
-    "find_restaurant_by_name": find_restaurant_by_name
+    "find_restaurant_by_name": find_restaurant_by_name,
+    "find_reservations": find_reservations
 }
@@ -9,7 +9,7 @@ TOOL_SCHEMA = [
                 "properties": {
                     "cuisine": {"type": "string", "description": "Cuisine mentioned by the user such as Italian, Mexican, Chinese, Indian."},
                     "location": {"type": "string", "description": "Area or city."},
-                    "guests": {"type": "integer", "description": "Minimum seating capacity."}
+                    "guests": {"type": "integer", "minimum": 1, "description": "Minimum seating capacity."}
                 },
                 "required": ["cuisine"]
             }
@@ -24,7 +24,7 @@ TOOL_SCHEMA = [
                 "type": "object",
                 "properties": {
                     "cuisine": {"type": "string"},
-                    "guests": {"type": "integer"}
+                    "guests": {"type": "integer", "minimum": 1}
                 },
                 "required": ["cuisine", "guests"]
             }
@@ -38,14 +38,34 @@ TOOL_SCHEMA = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "restaurant_id": {"type": "integer", "description": "ID of the restaurant"},
+                    "restaurant_id": {"type": "integer", "minimum": 1, "description": "ID of the restaurant"},
                     "date": {"type": "string", "description": "Date in dd-mm-yyyy format (e.g., 25-12-2025)"},
-                    "time": {"type": "string", "description": "Time in HH:MM format or with AM/PM"}
+                    "time": {"type": "string", "description": "Time in HH:MM format or with AM/PM"},
+                    "guests": {"type": "integer", "minimum": 1, "description": "Party size, used to work out how many tables are needed"}
                 },
                 "required": ["restaurant_id", "date", "time"]
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "check_availability_bulk",
+            "description": "Check several restaurants and times in ONE call, e.g. 'which Italian places are free at 8pm on Friday'. Pass restaurant_ids from earlier results, or a cuisine/location filter.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "date": {"type": "string", "description": "Date in dd-mm-yyyy format (e.g., 25-12-2025)"},
+                    "times": {"type": "array", "items": {"type": "string"}, "description": "Times in HH:MM format or with AM/PM"},
+                    "restaurant_ids": {"type": "array", "items": {"type": "integer", "minimum": 1}, "description": "IDs of the restaurants to check"},
+                    "cuisine": {"type": "string", "description": "Check every restaurant of this cuisine instead of listing IDs"},
+                    "location": {"type": "string", "description": "Check every restaurant in this area instead of listing IDs"},
+                    "guests": {"type": "integer", "minimum": 1, "description": "Party size"}
+                },
+                "required": ["date", "times"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -55,10 +75,10 @@ TOOL_SCHEMA = [
                 "type": "object",
                 "properties": {
                     "user_name": {"type": "string", "description": "Full name of the person making the reservation"},
-                    "restaurant_id": {"type": "integer", "description": "ID of the restaurant from search results"},
+                    "restaurant_id": {"type": "integer", "minimum": 1, "description": "ID of the restaurant from search results"},
                     "date": {"type": "string", "description": "Date in dd-mm-yyyy format (e.g., 25-12-2025)"},
                     "time": {"type": "string", "description": "Time in HH:MM format or with AM/PM"},
-                    "guests": {"type": "integer", "description": "Number of guests for the reservation"},
+                    "guests": {"type": "integer", "minimum": 1, "description": "Number of guests for the reservation"},
                     "phone_number": {"type": "string", "description": "Phone number with country code (e.g., +91-9876543210)"}
                 },
                 "required": ["user_name", "restaurant_id", "date", "time", "guests", "phone_number"]
@@ -73,7 +93,7 @@ TOOL_SCHEMA = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "reservation_id": {"type": "integer"}
+                    "reservation_id": {"type": "integer", "minimum": 1}
                 },
                 "required": ["reservation_id"]
             }
@@ -87,15 +107,32 @@ TOOL_SCHEMA = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "reservation_id": {"type": "integer"},
+                    "reservation_id": {"type": "integer", "minimum": 1},
                     "date": {"type": "string"},
                     "time": {"type": "string"},
-                    "guests": {"type": "integer"}
+                    "guests": {"type": "integer", "minimum": 1}
                 },
                 "required": ["reservation_id"]
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_reservations",
+            "description": "Look up the user's bookings by phone number, or by full name together with the booking date, e.g. to find the reservation_id for 'cancel my booking for Friday'. Returns upcoming bookings unless include_past is true.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "phone_number": {"type": "string", "description": "Phone number used for the booking"},
+                    "user_name": {"type": "string", "description": "Exact full name the booking was made under; needs phone_number or date too"},
+                    "restaurant_id": {"type": "integer", "minimum": 1, "description": "Only bookings at this restaurant"},
+                    "date": {"type": "string", "description": "Only bookings on this date, dd-mm-yyyy"},
+                    "include_past": {"type": "boolean", "description": "Also return bookings before today"}
+                }
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -111,3 +148,32 @@ TOOL_SCHEMA = [
         }
     }
 ]
+
+TOOLS_BY_INTENT = {
+    "greeting": [],
+    "search": [
+        "search_restaurants",
+        "recommend_restaurants",
+        "check_availability_bulk",
+        "find_restaurant_by_name"
+    ],
+    "booking": [
+        "find_restaurant_by_name",
+        "check_availability",
+        "check_availability_bulk",
+        "create_reservation"
+    ],
+    "manage": [
+        "find_reservations",
+        "cancel_reservation",
+        "update_reservation",
+        "check_availability"
+    ]
+}
+
+
+def tools_for_intent(intent):
+    names = TOOLS_BY_INTENT.get(intent)
+    if names is None:
+        return TOOL_SCHEMA
+    return [tool for tool in TOOL_SCHEMA if tool["function"]["name"] in names]
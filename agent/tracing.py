@@ -0,0 +1,280 @@
+"""Spans, counters and a Prometheus text dump for per-turn latency.
+
+Off unless AGENT_TRACING=1; when off, span() hands back one shared no-op
+object and count() returns immediately, so instrumented code pays for a
+global lookup and a call. With AGENT_OTEL=1 and opentelemetry installed,
+every span is also started on the global OpenTelemetry tracer, so whatever
+exporter the host process configured receives them.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACING_ENABLED = os.getenv("AGENT_TRACING", "0") == "1"
+METRICS_PORT = os.getenv("AGENT_METRICS_PORT")
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_TURNS = 50
+
+_otel_tracer = None
+if TRACING_ENABLED and os.getenv("AGENT_OTEL", "0") == "1":
+    try:
+        from opentelemetry import trace as _otel_trace
+        _otel_tracer = _otel_trace.get_tracer("restaurant-agent")
+    except ImportError:
+        _otel_tracer = None
+
+# The turn a span belongs to. Set by the sync entry points in the caller's
+# thread, so every task run_sync/iterate_sync schedules inherits it; the
+# router copies it into tool threads.
+_current_turn = contextvars.ContextVar("agent_turn", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """Counters and fixed-bucket histograms keyed by (name, labels)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = {"counts": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+                self._histograms[key] = entry
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+                    break
+            entry["count"] += 1
+            entry["sum"] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            counters = {
+                f"{name}{_format_labels(labels)}": value
+                for (name, labels), value in self._counters.items()
+            }
+            histograms = {
+                f"{name}{_format_labels(labels)}": {
+                    "count": entry["count"],
+                    "sum": round(entry["sum"], 6),
+                    "mean": entry["sum"] / entry["count"] if entry["count"] else None
+                }
+                for (name, labels), entry in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), entry in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {entry['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {entry['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+_recent_turns = deque(maxlen=RECENT_TURNS)
+
+
+class _NoopSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times a block into the `<name>_seconds` histogram.
+
+    Labels become metric labels, so keep them low-cardinality (tool name,
+    model, backend). set() attaches free-form attributes that only go to the
+    turn breakdown and OpenTelemetry.
+    """
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.attributes = {}
+        self._otel = None
+
+    def __enter__(self):
+        if _otel_tracer is not None:
+            turn = _current_turn.get()
+            parent = turn._otel if turn is not None and turn is not self else None
+            context = _otel_trace.set_span_in_context(parent) if parent is not None else None
+            self._otel = _otel_tracer.start_span(self.name, context=context, attributes=dict(self.labels))
+        self._start = time.perf_counter()
+        return self
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = self.seconds = time.perf_counter() - self._start
+        # GeneratorExit (a stream the caller stopped reading) is not a failure.
+        status = "error" if exc_type is not None and issubclass(exc_type, Exception) else "ok"
+        metrics.observe(f"{self.name}_seconds", seconds, status=status, **self.labels)
+
+        turn = _current_turn.get()
+        if turn is not None and turn is not self:
+            turn.spans.append({
+                "name": self.name,
+                **self.labels,
+                **self.attributes,
+                "ms": round(seconds * 1e3, 3),
+                "status": status
+            })
+
+        if self._otel is not None:
+            for key, value in self.attributes.items():
+                self._otel.set_attribute(key, value)
+            if exc is not None:
+                self._otel.record_exception(exc)
+            self._otel.end()
+        return False
+
+
+class TurnSpan(Span):
+    """Root span for one agent turn; child spans are collected as its breakdown."""
+
+    def __init__(self, labels):
+        super().__init__("agent_turn", labels)
+        self.spans = []
+
+    def __enter__(self):
+        self._token = _current_turn.set(self)
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        try:
+            _current_turn.reset(self._token)
+        except ValueError:
+            # A streaming turn can be closed from another context (generator GC).
+            _current_turn.set(None)
+        _recent_turns.append({
+            **self.labels,
+            **self.attributes,
+            "ms": round(self.seconds * 1e3, 3),
+            "spans": self.spans
+        })
+        return False
+
+
+def span(name, **labels):
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    return Span(name, labels)
+
+
+def turn_span(**labels):
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    return TurnSpan(labels)
+
+
+def count(name, value=1, **labels):
+    if TRACING_ENABLED:
+        metrics.inc(name, value, **labels)
+
+
+def annotate_turn(**attributes):
+    """Attach attributes (e.g. which path answered) to the current turn, if any."""
+    if TRACING_ENABLED:
+        turn = _current_turn.get()
+        if turn is not None:
+            turn.attributes.update(attributes)
+
+
+def copy_context():
+    """Context to run a callable in so its spans still attach to the current turn."""
+    return contextvars.copy_context()
+
+
+def recent_turns():
+    return list(_recent_turns)
+
+
+def metrics_text():
+    return metrics.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve GET /metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,171 @@
+import re
+
+import orjson
+
+from agent.availability import format_time, parse_date, parse_time
+from agent.tools_schema import TOOL_SCHEMA
+
+TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+INTEGER_RE = re.compile(r"^\s*[+-]?\d+\s*$")
+
+# Formats are keyed by field name; the schema sent to the model stays plain JSON Schema.
+FIELD_FORMATS = {
+    "date": "date",
+    "time": "time",
+    "times": "time",
+    "phone_number": "phone"
+}
+
+
+class ArgumentError(ValueError):
+    pass
+
+
+def parse_arguments(raw):
+    """Parse a tool-call argument string into a dict, tolerating trailing commas."""
+    if isinstance(raw, dict):
+        return raw
+    raw = (raw or "").strip() or "{}"
+    try:
+        value = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        try:
+            value = orjson.loads(TRAILING_COMMA_RE.sub(r'\1', raw))
+        except orjson.JSONDecodeError as e:
+            raise ArgumentError(f"is not valid JSON ({e})")
+    if not isinstance(value, dict):
+        raise ArgumentError("must be a JSON object")
+    return value
+
+
+def _coerce_integer(value):
+    if isinstance(value, bool):
+        raise ArgumentError("must be an integer")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and INTEGER_RE.match(value):
+        return int(value)
+    raise ArgumentError("must be an integer")
+
+
+def _coerce_boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    if value in (0, 1):
+        return bool(value)
+    raise ArgumentError("must be true or false")
+
+
+def _coerce_string(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            raise ArgumentError("must not be empty")
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ArgumentError("must be a string")
+
+
+def _apply_format(fmt, value):
+    if fmt == "date":
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ArgumentError("must be a date in DD-MM-YYYY format")
+        return parsed.strftime("%d-%m-%Y")
+    if fmt == "time":
+        minutes = parse_time(value)
+        if minutes is None:
+            raise ArgumentError("must be a time like 19:30 or 7:30 PM")
+        return format_time(minutes)
+    if fmt == "phone":
+        if sum(ch.isdigit() for ch in value) < 7:
+            raise ArgumentError("must be a phone number with country code")
+    return value
+
+
+def _compile_field(name, spec):
+    kind = spec.get("type")
+    fmt = FIELD_FORMATS.get(name)
+
+    if kind == "integer":
+        minimum = spec.get("minimum")
+        if minimum is None:
+            return _coerce_integer
+
+        def coerce_bounded(value):
+            value = _coerce_integer(value)
+            if value < minimum:
+                raise ArgumentError(f"must be at least {minimum}")
+            return value
+        return coerce_bounded
+    if kind == "boolean":
+        return _coerce_boolean
+    if kind == "string":
+        if fmt:
+            return lambda value: _apply_format(fmt, _coerce_string(value))
+        return _coerce_string
+    if kind == "array":
+        item = _compile_field(name, spec.get("items", {}))
+
+        def coerce_array(value):
+            if not isinstance(value, list):
+                value = [value]
+            if not value:
+                raise ArgumentError("must not be empty")
+            return [item(v) for v in value]
+        return coerce_array
+    return lambda value: value
+
+
+class ToolValidator:
+    """Type checks, coerces and normalizes the arguments for one tool."""
+
+    def __init__(self, function_schema):
+        parameters = function_schema.get("parameters", {})
+        self.name = function_schema["name"]
+        self.required = list(parameters.get("required", []))
+        self.fields = {
+            name: _compile_field(name, spec)
+            for name, spec in parameters.get("properties", {}).items()
+        }
+
+    def validate(self, arguments):
+        """Return (clean_arguments, errors); errors is a list of {field, message}."""
+        clean = {}
+        errors = []
+        for name, value in arguments.items():
+            if value is None:
+                continue
+            coerce = self.fields.get(name)
+            if coerce is None:
+                errors.append({"field": name, "message": f"is not a parameter of {self.name}"})
+                continue
+            try:
+                clean[name] = coerce(value)
+            except ArgumentError as e:
+                errors.append({"field": name, "message": str(e)})
+
+        for name in self.required:
+            if name not in clean and not any(err["field"] == name for err in errors):
+                errors.append({"field": name, "message": "is required"})
+        return clean, errors
+
+
+def compile_validators(tool_schema):
+    return {tool["function"]["name"]: ToolValidator(tool["function"]) for tool in tool_schema}
+
+
+VALIDATORS = compile_validators(TOOL_SCHEMA)
+
+
+def validation_error(tool_name, errors):
+    details = "; ".join(f"{err['field']} {err['message']}" for err in errors)
+    return {
+        "error": f"Invalid arguments for {tool_name}: {details}",
+        "validation_errors": errors
+    }
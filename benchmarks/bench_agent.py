@@ -0,0 +1,81 @@
+"""End-to-end agent_reply turns against a scripted fake LLM.
+
+    python -m benchmarks.bench_agent --restaurants 1000 --reservations 100000
+
+Each scenario is a family of user messages; the fake client answers with the
+tool call a real model would make, so a turn covers intent routing, prompt
+assembly, validation, the tool itself and reply formatting, without network.
+"""
+import random
+
+from benchmarks.common import Reporter, dataset_args, measure, prepare_dataset
+from benchmarks.fake_groq import FakeGroqClient
+
+RULES = [
+    (r"tell me about (.+)$", "find_restaurant_by_name",
+     lambda m: {"restaurant_name": m.group(1)}),
+    (r"book restaurant (\d+) on (\S+) at (\S+) for (\d+)", "check_availability",
+     lambda m: {"restaurant_id": m.group(1), "date": m.group(2), "time": m.group(3), "guests": m.group(4)}),
+    (r"which (\w[\w ]*?) places have room on (\S+) at (\S+)", "check_availability_bulk",
+     lambda m: {"date": m.group(2), "times": [m.group(3)], "cuisine": m.group(1)}),
+    (r"my bookings under (\+[\d-]+)", "find_reservations",
+     lambda m: {"phone_number": m.group(1), "include_past": True}),
+]
+
+
+def scenarios(catalog, history, iterations, seed):
+    rng = random.Random(seed)
+    n = range(iterations)
+
+    def day():
+        return f"{rng.randint(1, 28):02d}-{rng.randint(1, 2):02d}-2030"
+
+    return {
+        "fast_path_search": [f"show me {rng.choice(catalog)['cuisine']} restaurants" for _ in n],
+        "llm_name_lookup": [f"tell me about {rng.choice(catalog)['name']}" for _ in n],
+        "llm_availability": [
+            f"can I book restaurant {rng.choice(catalog)['id']} on {day()} at 19:30 for {rng.randint(1, 8)}?"
+            for _ in n
+        ],
+        "llm_bulk_availability": [
+            f"which {rng.choice(catalog)['cuisine'].lower()} places have room on {day()} at 20:00"
+            for _ in n
+        ],
+        "llm_find_reservations": [
+            f"my bookings under {rng.choice(history)['phone_number']}" for _ in n
+        ],
+        "llm_small_talk": ["thanks, that's all for now" for _ in n]
+    }
+
+
+def main():
+    args = dataset_args(__doc__.splitlines()[0]).parse_args()
+    _, catalog, history = prepare_dataset(args)
+
+    from agent import llm
+    from agent.intent import fast_path_stats
+
+    fake = FakeGroqClient(RULES)
+    llm.client = fake
+    reporter = Reporter(args)
+    chat_history = [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "Hello! How can I help you with a restaurant booking?"}
+    ]
+    llm.agent_reply("hello", chat_history)
+
+    for name, messages in scenarios(catalog, history, args.iterations, args.seed).items():
+        llm_calls = fake.calls
+        fast_hits = fast_path_stats()["hits"]
+        stats = measure(lambda text: llm.agent_reply(text, chat_history), messages)
+        reporter.emit(
+            "agent_reply", name, stats,
+            llm_calls_per_turn=round((fake.calls - llm_calls) / len(messages), 2),
+            fast_path_hits=fast_path_stats()["hits"] - fast_hits
+        )
+
+    reporter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Keyword extraction through KeywordMatcher vs the old per-key loop, by vocabulary size.
+
+    python -m benchmarks.bench_entities --sizes 60,1000,10000,100000 --iterations 200
+"""
+import random
+import string
+import time
+
+from benchmarks.common import Reporter, dataset_args, measure, prepare_dataset
+
+MESSAGES = [
+    "show me italian restaurants",
+    "book a table for 4 at a north indian place downtown on 25-12-2025 at 7 pm",
+    "any good sushi spots near the harbor?",
+    "I'd like to change my reservation to 8pm please",
+]
+
+
+def synthetic_vocabulary(base, size, seed=7):
+    rng = random.Random(seed)
+    vocab = dict(base)
+    while len(vocab) < size:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+        vocab[word] = word.title()
+    return vocab
+
+
+def legacy_extract(vocab, text):
+    # The per-key loop agent_reply used before the shared matcher.
+    user_lower = text.lower()
+    for key, value in vocab.items():
+        if (key in user_lower or
+            (key + " restaurant") in user_lower or
+            (key + " food") in user_lower or
+            (key + " place") in user_lower or
+            ("book " + key) in user_lower or
+            ("table " + key) in user_lower):
+            return value
+    return None
+
+
+def main():
+    parser = dataset_args(__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="60,1000,10000,100000", help="Comma-separated vocabulary sizes")
+    args = parser.parse_args()
+    prepare_dataset(args)
+
+    # Imported after prepare_dataset: agent.entities pulls in agent.tools.
+    from agent.entities import CUISINE_MAPPING
+    from agent.matcher import KeywordMatcher
+
+    reporter = Reporter(args)
+    messages = [MESSAGES[i % len(MESSAGES)] for i in range(args.iterations)]
+    for size in (int(s) for s in args.sizes.split(",")):
+        vocab = synthetic_vocabulary(CUISINE_MAPPING, size)
+        build_start = time.perf_counter()
+        matcher = KeywordMatcher(vocab)
+        build_s = round(time.perf_counter() - build_start, 4)
+
+        reporter.emit("entity_extraction", f"matcher/{size}", measure(matcher.longest_matches, messages),
+                      vocabulary=size, build_s=build_s)
+        reporter.emit("entity_extraction", f"legacy/{size}", measure(lambda m: legacy_extract(vocab, m), messages),
+                      vocabulary=size)
+
+    reporter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Restaurant name lookups through NameIndex vs the old linear scan, on the generated catalog.
+
+    python -m benchmarks.bench_name_index --restaurants 100000 --iterations 200
+"""
+import random
+import time
+
+from benchmarks.common import Reporter, dataset_args, measure, prepare_dataset
+
+
+def misspell(name, rng):
+    chars = list(name)
+    i = rng.randrange(1, len(chars) - 1)
+    if chars[i] == " ":
+        return name
+    del chars[i]
+    return "".join(chars)
+
+
+def legacy_lookup(names, query):
+    # The linear scan find_restaurant_by_name used before the index.
+    search = query.lower().strip()
+    return [n for n in names if search == n.lower() or search in n.lower()
+            or any(word in n.lower() for word in search.split() if len(word) > 2)]
+
+
+def main():
+    args = dataset_args(__doc__.splitlines()[0]).parse_args()
+    _, catalog, _ = prepare_dataset(args)
+
+    from agent.names import NameIndex
+
+    reporter = Reporter(args)
+    rng = random.Random(args.seed)
+    names = [r["name"] for r in catalog]
+    build_start = time.perf_counter()
+    index = NameIndex(names)
+    build_s = round(time.perf_counter() - build_start, 4)
+
+    exact = [rng.choice(names) for _ in range(args.iterations)]
+    typos = [misspell(name, rng) for name in exact]
+    partial = [" ".join(name.split()[:2]) for name in exact]
+    found = sum(1 for q, name in zip(typos, exact)
+                if (top := index.lookup(q, 1)) and index.names[top[0][0]] == name)
+
+    reporter.emit("name_index", "exact", measure(index.lookup, exact), build_s=build_s)
+    reporter.emit("name_index", "typo", measure(index.lookup, typos), typo_top1_rate=round(found / len(typos), 3))
+    reporter.emit("name_index", "partial", measure(index.lookup, partial))
+    reporter.emit("name_index", "legacy", measure(lambda q: legacy_lookup(names, q), exact[:20]))
+
+    reporter.close()
+
+
+if __name__ == "__main__":
+    main()
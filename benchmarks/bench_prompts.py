@@ -0,0 +1,12 @@
+import json
+
+from agent.prompts import prompt_variant_report
+
+
+def main():
+    for variant, tokens in prompt_variant_report().items():
+        print(json.dumps({"benchmark": "prompt_variant", "variant": variant, **tokens}))
+
+
+if __name__ == "__main__":
+    main()
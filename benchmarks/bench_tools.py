@@ -0,0 +1,97 @@
+"""Per-tool latency on a generated dataset, called directly and via execute_tool.
+
+    python -m benchmarks.bench_tools --restaurants 10000 --reservations 1000000
+
+Write tools mutate the generated store, so every run starts from a fresh
+temp directory.
+"""
+import json
+import random
+from datetime import date, timedelta
+
+from benchmarks.common import Reporter, dataset_args, measure, prepare_dataset
+
+
+def tool_inputs(catalog, history, iterations, seed):
+    """Seeded argument dicts for every tool, `iterations` calls each."""
+    rng = random.Random(seed)
+    start = date(2030, 1, 1)
+
+    def day():
+        return (start + timedelta(days=rng.randrange(60))).strftime("%d-%m-%Y")
+
+    def time_of_day():
+        return f"{rng.randrange(11, 23):02d}:{rng.choice(['00', '30'])}"
+
+    def restaurant():
+        return rng.choice(catalog)
+
+    picked = rng.sample(history, min(len(history), 2 * iterations))
+    to_update, to_cancel = picked[:iterations], picked[iterations:]
+    n = range(iterations)
+
+    return {
+        "search_restaurants": [
+            {"cuisine": restaurant()["cuisine"], "location": restaurant()["location"], "guests": rng.randint(1, 8)}
+            for _ in n
+        ],
+        "recommend_restaurants": [{"cuisine": restaurant()["cuisine"], "guests": rng.randint(1, 8)} for _ in n],
+        "find_restaurant_by_name": [{"restaurant_name": restaurant()["name"]} for _ in n],
+        "check_availability": [
+            {"restaurant_id": restaurant()["id"], "date": day(), "time": time_of_day(), "guests": rng.randint(1, 8)}
+            for _ in n
+        ],
+        "check_availability_bulk": [
+            {"date": day(), "times": [time_of_day() for _ in range(3)], "cuisine": restaurant()["cuisine"]}
+            for _ in n
+        ],
+        "create_reservation": [
+            {
+                "user_name": "Bench Guest",
+                "restaurant_id": restaurant()["id"],
+                "date": day(),
+                "time": time_of_day(),
+                "guests": rng.randint(1, 8),
+                "phone_number": f"+91-8{rng.randrange(10 ** 9):09d}"
+            }
+            for _ in n
+        ],
+        "find_reservations": [
+            {"phone_number": r["phone_number"], "include_past": True}
+            for r in rng.sample(history, min(len(history), iterations))
+        ],
+        "update_reservation": [
+            {"reservation_id": r["reservation_id"], "date": day(), "time": time_of_day()}
+            for r in to_update
+        ],
+        "cancel_reservation": [{"reservation_id": r["reservation_id"]} for r in to_cancel]
+    }
+
+
+def main():
+    args = dataset_args(__doc__.splitlines()[0]).parse_args()
+    _, catalog, history = prepare_dataset(args)
+
+    # Imported after prepare_dataset so agent.tools picks up the generated data/.
+    from agent import tools
+    from agent.router import execute_tool
+
+    reporter = Reporter(args)
+    # Warm the catalog, name index, store and engine so the first sample is not a cold start.
+    tools.find_restaurant_by_name(catalog[0]["name"])
+    tools.check_availability(catalog[0]["id"], "01-01-2030", "19:00")
+
+    # Direct calls run first on half the inputs; execute_tool gets the other
+    # half so write tools never replay an already cancelled/updated id.
+    for name, inputs in tool_inputs(catalog, history, 2 * args.iterations, args.seed).items():
+        fn = getattr(tools, name)
+        direct, routed = inputs[::2], inputs[1::2]
+        reporter.emit("tools", name, measure(lambda kwargs: fn(**kwargs), direct))
+        raw = [json.dumps(kwargs) for kwargs in routed]
+        reporter.emit("execute_tool", name, measure(lambda arguments: execute_tool(name, arguments), raw))
+
+    reporter.close()
+
+
+if __name__ == "__main__":
+    main()
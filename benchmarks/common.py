@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from benchmarks.generators import write_dataset
+
+
+def summarize(samples):
+    """Throughput and latency percentiles (milliseconds) for a list of seconds."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+
+    def pct(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1e3, 4)
+
+    return {
+        "iterations": len(ordered),
+        "throughput_per_s": round(len(ordered) / total, 1) if total else None,
+        "p50_ms": pct(0.5),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1e3, 4)
+    }
+
+
+def measure(fn, inputs):
+    samples = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_args(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--restaurants", type=int, default=1_000)
+    parser.add_argument("--reservations", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--backend", default="sqlite")
+    parser.add_argument("--output", help="Also write all results as one JSON document to this file")
+    return parser
+
+
+def prepare_dataset(args):
+    """Generate the dataset in a temp dir and make it the working directory.
+
+    agent.tools resolves data/ from the working directory at import time, so
+    this must run before anything from agent is imported.
+    """
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    catalog, history = write_dataset(workdir, args.restaurants, args.reservations, args.seed)
+    os.chdir(workdir)
+    os.environ["RESERVATION_BACKEND"] = args.backend
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ.setdefault("LLM_CACHE_SIZE", "0")
+    return workdir, catalog, history
+
+
+class Reporter:
+
+    def __init__(self, args):
+        self.args = args
+        self.meta = {
+            "commit": git_commit(),
+            "restaurants": args.restaurants,
+            "reservations": args.reservations,
+            "seed": args.seed,
+            "backend": args.backend
+        }
+        self.results = []
+
+    def emit(self, benchmark, name, stats, **extra):
+        record = {"benchmark": benchmark, "name": name, **self.meta, **extra, **stats}
+        self.results.append(record)
+        print(json.dumps(record), flush=True)
+
+    def close(self):
+        if self.args.output:
+            with open(self.args.output, "w") as f:
+                json.dump({"meta": self.meta, "results": self.results}, f, indent=2)
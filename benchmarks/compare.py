@@ -0,0 +1,51 @@
+"""Diff two --output files from any benchmark (bench_tools, bench_agent, bench_entities, bench_name_index).
+
+    python -m benchmarks.compare before.json after.json [--threshold 0.2]
+
+Prints one JSON line per benchmark with the p50/p99 ratio (after / before)
+and exits non-zero if any p99 got worse by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        document = json.load(f)
+    return {(r["benchmark"], r["name"]): r for r in document["results"]}
+
+
+def ratio(after, before):
+    return round(after / before, 3) if before else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        p99_ratio = ratio(new["p99_ms"], old["p99_ms"])
+        regressed = p99_ratio is not None and p99_ratio > 1 + args.threshold
+        regressions += regressed
+        print(json.dumps({
+            "benchmark": key[0],
+            "name": key[1],
+            "before_commit": old.get("commit"),
+            "after_commit": new.get("commit"),
+            "p50_ratio": ratio(new["p50_ms"], old["p50_ms"]),
+            "p99_ratio": p99_ratio,
+            "throughput_ratio": ratio(new["throughput_per_s"] or 0, old["throughput_per_s"] or 0),
+            "regressed": regressed
+        }))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Deterministic in-process stand-in for the LLM client.
+
+Install it with `agent.llm.client = FakeGroqClient(rules)`. Each rule is
+(regex, tool_name, build_arguments); the first rule whose regex matches the
+latest user message is answered with that tool call, and once tool results
+are in the conversation the fake replies with plain text. No randomness and
+no network, so agent_reply timings only reflect this codebase.
+"""
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+FINAL_REPLY = "Here is what I found."
+DEFAULT_REPLY = "How can I help you with a restaurant booking?"
+
+
+def _message(content=None, tool_calls=None):
+    return SimpleNamespace(content=content, tool_calls=tool_calls)
+
+
+def _tool_call(call_id, name, arguments):
+    return SimpleNamespace(
+        id=call_id,
+        type="function",
+        function=SimpleNamespace(name=name, arguments=json.dumps(arguments))
+    )
+
+
+class FakeGroqClient:
+
+    def __init__(self, rules=(), latency=0.0):
+        self.rules = [(re.compile(pattern, re.IGNORECASE), tool, build) for pattern, tool, build in rules]
+        self.latency = latency
+        self.calls = 0
+        self._next_id = 0
+
+    def _answer(self, messages):
+        if messages[-1]["role"] == "tool":
+            return _message(content=FINAL_REPLY)
+
+        user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        for pattern, tool, build in self.rules:
+            match = pattern.search(user)
+            if match:
+                self._next_id += 1
+                return _message(tool_calls=[_tool_call(f"call_{self._next_id}", tool, build(match))])
+        return _message(content=DEFAULT_REPLY)
+
+    async def create(self, messages, stream=False, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = self._answer(messages)
+        if stream:
+            return self._stream(message)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+    async def _stream(self, message):
+        tool_calls = [
+            SimpleNamespace(index=i, id=tc.id, function=tc.function)
+            for i, tc in enumerate(message.tool_calls or [])
+        ]
+        delta = SimpleNamespace(content=message.content, tool_calls=tool_calls or None)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    def stats(self):
+        return {"requests": self.calls}
@@ -0,0 +1,143 @@
+"""Minimal OpenAI-compatible chat completions server for offline testing.
+
+    python -m benchmarks.fake_llm_server --port 8099 --latency 0.2 --error-rate 0.1
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=fake python main.py
+
+Replies with a fixed assistant message (or an SSE stream when stream=true).
+--error-rate answers that fraction of requests with 429/503, and
+--slow-rate/--slow-latency add a latency tail so retries and hedging can be
+exercised.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "Hello! I can help you find a restaurant or book a table."
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        try:
+            self._handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on this request, e.g. a hedged duplicate lost.
+            self.close_connection = True
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = self.config
+        config.count("requests")
+
+        roll = random.random()
+        if roll < config.error_rate:
+            config.count("errors")
+            status = random.choice([429, 503])
+            self._send_json(status, {"error": {"message": "fake failure", "type": "server_error"}},
+                            {"retry-after": "0"} if status == 429 else None)
+            return
+
+        latency = config.latency
+        if random.random() < config.slow_rate:
+            latency = config.slow_latency
+        time.sleep(latency)
+
+        model = request.get("model", "fake")
+        if request.get("stream"):
+            self._stream(model)
+            return
+        self._send_json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": config.reply},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    def _stream(self, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in self.config.reply.split(" "):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+class FakeLLMConfig:
+
+    def __init__(self, latency=0.0, error_rate=0.0, slow_rate=0.0, slow_latency=1.0, reply=REPLY):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.reply = reply
+        self.counters = {"requests": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+def start_server(port=0, **config):
+    """Start the server on a daemon thread; returns (server, base_url, config)."""
+    handler = type("Handler", (FakeLLMHandler,), {"config": FakeLLMConfig(**config)})
+    server_class = type("Server", (ThreadingHTTPServer,), {"request_queue_size": 256, "daemon_threads": True})
+    server = server_class(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", handler.config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    args = parser.parse_args()
+
+    server, url, _ = start_server(args.port, latency=args.latency, error_rate=args.error_rate,
+                                  slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    print(f"Fake LLM server on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
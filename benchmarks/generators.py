@@ -0,0 +1,80 @@
+"""Seeded synthetic catalogs and reservation histories.
+
+The same (size, seed) always produces the same data, so results from two
+commits are measured against identical inputs.
+"""
+import json
+import os
+import random
+from datetime import date, timedelta
+
+CUISINES = [
+    "Italian", "Mexican", "Indian", "Chinese", "Japanese", "American", "Thai", "French",
+    "Korean", "Mediterranean", "North Indian", "South Indian", "Turkish", "Spanish",
+    "Greek", "Steakhouse", "Vegetarian", "Barbecue", "Seafood", "Vietnamese"
+]
+LOCATIONS = [
+    "Downtown", "City Center", "Harbor Road", "East Side", "Uptown", "West Market",
+    "South Block", "Old Town", "Central Avenue", "North Plaza", "Lake View", "Tech Park"
+]
+NAME_WORDS = [
+    "Spice", "Garden", "Golden", "Dragon", "Bella", "Ocean", "Pearl", "Royal", "Urban",
+    "Fiesta", "Lotus", "Olive", "Saffron", "Ember", "Harbor", "Maple", "Jade", "Copper"
+]
+NAME_SUFFIXES = ["House", "Kitchen", "Cafe", "Grill", "Bistro", "Diner", "Bar", "Corner", "Lounge", "Table"]
+FIRST_NAMES = ["Aarav", "Maya", "John", "Priya", "Liam", "Sara", "Rohan", "Emma", "Kabir", "Noah", "Isha", "Leo"]
+LAST_NAMES = ["Sharma", "Doe", "Patel", "Smith", "Khan", "Garcia", "Mehta", "Brown", "Iyer", "Lee"]
+
+
+def generate_restaurants(count, seed=1):
+    rng = random.Random(seed)
+    restaurants = []
+    for i in range(1, count + 1):
+        tables = rng.randint(5, 30)
+        words = rng.sample(NAME_WORDS, 2)
+        restaurants.append({
+            "id": i,
+            "name": f"{words[0]} {words[1]} {rng.choice(NAME_SUFFIXES)} {i}",
+            "cuisine": rng.choice(CUISINES),
+            "location": rng.choice(LOCATIONS),
+            "seating_capacity": tables * rng.choice([2, 4, 6]),
+            "available_tables": tables,
+            "rating": round(rng.uniform(3.0, 5.0), 1)
+        })
+    return restaurants
+
+
+def generate_reservations(restaurants, count, seed=2, start=None, days=60):
+    """Canonical reservation rows spread over `days` days from `start`."""
+    rng = random.Random(seed)
+    start = start or date(2030, 1, 1)
+    reservations = []
+    for i in range(1, count + 1):
+        restaurant = rng.choice(restaurants)
+        minute = rng.choice(range(11 * 60, 22 * 60 + 1, 30))
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        reservations.append({
+            "reservation_id": i,
+            "user_name": name,
+            "restaurant_id": restaurant["id"],
+            "date": (start + timedelta(days=rng.randrange(days))).isoformat(),
+            "time": f"{minute // 60:02d}:{minute % 60:02d}",
+            "minute": minute,
+            "guests": rng.randint(1, 8),
+            "phone_number": f"+91-9{rng.randrange(10 ** 9):09d}",
+            "created_at": "2029-12-01T12:00:00"
+        })
+    return reservations
+
+
+def write_dataset(directory, restaurants=1_000, reservations=10_000, seed=1):
+    """Write data/restaurants.json and data/reservations.json under directory."""
+    data_dir = os.path.join(directory, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    catalog = generate_restaurants(restaurants, seed)
+    history = generate_reservations(catalog, reservations, seed + 1)
+    with open(os.path.join(data_dir, "restaurants.json"), "w") as f:
+        json.dump(catalog, f)
+    with open(os.path.join(data_dir, "reservations.json"), "w") as f:
+        json.dump(history, f)
+    return catalog, history
@@ -0,0 +1,199 @@
+"""Concurrent booking conversations against agent_reply, then a storage audit.
+
+    python -m benchmarks.load_test --conversations 500 --concurrency 32 --llm-latency 0.05
+    python -m benchmarks.load_test --backend json --rate 20 --hot-restaurants 3
+
+Every conversation is the scripted five-turn booking flow (pick a restaurant,
+name, phone, date/time/guests, "yes"), answered by the in-process fake LLM.
+Conversations are aimed at a few hot restaurants and times so they compete
+for the same tables. Afterwards the store is reopened from disk and checked:
+
+  double_booked_slots  slots holding more tables than the restaurant has
+  lost_writes          confirmations the user saw with no matching stored row
+  phantom_writes       stored rows on the load-test date nobody was told about
+"""
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from benchmarks.common import Reporter, dataset_args, prepare_dataset, summarize
+from benchmarks.fake_groq import FakeGroqClient
+
+LOAD_DATE = "15-06-2031"  # outside the generated history, so every row on it comes from this run
+LOAD_TIMES = ["7:00 pm", "7:30 pm", "8:00 pm"]
+RESERVATION_ID_RE = re.compile(r"Reservation ID: (\d+)")
+
+RULES = [
+    (r"book a table at (.+)$", "find_restaurant_by_name",
+     lambda m: {"restaurant_name": m.group(1)}),
+]
+
+
+def conversation_scripts(catalog, count, hot_restaurants, seed):
+    rng = random.Random(seed)
+    hot = rng.sample(catalog, min(hot_restaurants, len(catalog)))
+    scripts = []
+    for i in range(count):
+        restaurant = rng.choice(hot)
+        phone = f"+91-7{i:09d}"
+        scripts.append({
+            "restaurant": restaurant,
+            "phone": phone,
+            "turns": [
+                f"I'd like to book a table at {restaurant['name']}",
+                f"Guest {chr(65 + i % 26)}{chr(65 + i // 26 % 26)}",
+                phone,
+                f"{LOAD_DATE} at {rng.choice(LOAD_TIMES)} for {rng.randint(1, 8)} guests",
+                "yes"
+            ]
+        })
+    return scripts
+
+
+def run_conversation(agent_reply, BookingState, script, think_time):
+    history = []
+    state = BookingState()
+    turn_seconds = []
+    reply = ""
+    for text in script["turns"]:
+        start = time.perf_counter()
+        reply = agent_reply(text, history, state)
+        turn_seconds.append(time.perf_counter() - start)
+        history.append({"role": "user", "content": text})
+        history.append({"role": "assistant", "content": reply})
+        if think_time:
+            time.sleep(think_time)
+
+    match = RESERVATION_ID_RE.search(reply)
+    return {
+        "phone": script["phone"],
+        "restaurant_id": script["restaurant"]["id"],
+        "reservation_id": int(match.group(1)) if match else None,
+        "turn_seconds": turn_seconds,
+        "seconds": sum(turn_seconds)
+    }
+
+
+def audit(rows, catalog_by_id, results):
+    """Oversold slots, lost confirmations and unreported rows on LOAD_DATE."""
+    from agent.availability import DINING_SLOTS, SLOT_MINUTES, SLOTS_PER_DAY, iso_date, tables_needed
+
+    day = iso_date(LOAD_DATE)
+    on_day = [r for r in rows if r["date"] == day]
+    booked = {}
+    for r in on_day:
+        restaurant = catalog_by_id[r["restaurant_id"]]
+        bucket = booked.setdefault(r["restaurant_id"], [0] * SLOTS_PER_DAY)
+        start = r["minute"] // SLOT_MINUTES
+        for slot in range(start, min(start + DINING_SLOTS, SLOTS_PER_DAY)):
+            bucket[slot] += tables_needed(restaurant, r.get("guests"))
+
+    double_booked = sum(
+        1
+        for restaurant_id, bucket in booked.items()
+        for tables in bucket
+        if tables > catalog_by_id[restaurant_id]["available_tables"]
+    )
+
+    stored = {r["reservation_id"]: r for r in on_day}
+    confirmed = [res for res in results if res["reservation_id"] is not None]
+    lost = sum(
+        1 for res in confirmed
+        if stored.get(res["reservation_id"], {}).get("phone_number") != res["phone"]
+    )
+    told = {res["reservation_id"] for res in confirmed}
+    phantom = sum(1 for reservation_id in stored if reservation_id not in told)
+    return {
+        "confirmed": len(confirmed),
+        "rejected": len(results) - len(confirmed),
+        "stored": len(on_day),
+        "double_booked_slots": double_booked,
+        "lost_writes": lost,
+        "phantom_writes": phantom
+    }
+
+
+def reopen_rows(backend):
+    """Read reservations back through a new store instance, bypassing every in-process cache."""
+    import os
+
+    from agent import tools
+    from agent.storage import EventLogReservationStore, JSONReservationStore, SQLiteReservationStore
+
+    if backend == "json":
+        return JSONReservationStore(tools.RESERVATIONS_FILE).all()
+    if backend == "sqlite":
+        return SQLiteReservationStore(tools.RESERVATIONS_DB).all()
+    return EventLogReservationStore(os.path.splitext(tools.RESERVATIONS_FILE)[0] + ".log.jsonl").all()
+
+
+def main():
+    parser = dataset_args(__doc__.splitlines()[0])
+    parser.set_defaults(restaurants=200, reservations=2_000)
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Poisson arrival rate in conversations/s; 0 starts them all at once")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="Seconds per fake LLM call")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds between a user's turns")
+    parser.add_argument("--hot-restaurants", type=int, default=5)
+    args = parser.parse_args()
+    _, catalog, _ = prepare_dataset(args)
+
+    from agent import llm
+    from agent.booking import BookingState
+
+    fake = FakeGroqClient(RULES, latency=args.llm_latency)
+    llm.client = fake
+    scripts = conversation_scripts(catalog, args.conversations, args.hot_restaurants, args.seed)
+    llm.agent_reply("hello", [])
+
+    rng = random.Random(args.seed)
+    results = []
+    results_lock = threading.Lock()
+
+    def job(script):
+        result = run_conversation(llm.agent_reply, BookingState, script, args.think_time)
+        with results_lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="conversation") as pool:
+        futures = []
+        next_arrival = start
+        for script in scripts:
+            if args.rate:
+                next_arrival += rng.expovariate(args.rate)
+                time.sleep(max(next_arrival - time.perf_counter(), 0))
+            futures.append(pool.submit(job, script))
+        wait(futures)
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    reporter = Reporter(args)
+    load = {
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "llm_latency_s": args.llm_latency,
+        "hot_restaurants": args.hot_restaurants
+    }
+    conversation_stats = summarize([r["seconds"] for r in results])
+    conversation_stats["throughput_per_s"] = round(len(results) / elapsed, 2)
+    reporter.emit(
+        "load_test", "conversation", conversation_stats,
+        **load,
+        llm_requests=fake.calls,
+        **audit(reopen_rows(args.backend), {r["id"]: r for r in catalog}, results)
+    )
+    turns = [s for r in results for s in r["turn_seconds"]]
+    turn_stats = summarize(turns)
+    turn_stats["throughput_per_s"] = round(len(turns) / elapsed, 2)
+    reporter.emit("load_test", "turn", turn_stats, **load)
+    reporter.close()
+
+
+if __name__ == "__main__":
+    main()
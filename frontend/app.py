@@ -2,48 +2,60 @@ import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import streamlit as st
-from agent.llm import agent_reply
+from agent.booking import BookingState
+from agent.sessions import SESSION_HISTORY_LIMIT
 
-st.set_page_config(page_title="Restaurant Reservation AI Agent", layout="centered")
-
-
-if "history" not in st.session_state:
-    st.session_state.history = []
+MAX_VISIBLE_MESSAGES = int(os.getenv("UI_VISIBLE_MESSAGES", "30"))
 
-if "input_key" not in st.session_state:
-    st.session_state.input_key = 0
+st.set_page_config(page_title="Restaurant Reservation AI Agent", layout="centered")
 
 
-st.title("🍽️ Restaurant Reservation AI Agent")
-st.write("Chat with the AI assistant to book a restaurant table.")
+@st.cache_resource
+def load_agent():
+    # Once per server process, not per rerun: the LLM client and its connection
+    # pool, the catalog with its name index, and the compiled matchers.
+    from agent import llm
+    from agent.catalog import get_catalog
+    from agent.entities import get_extractor
+    from agent.intent import get_router
+    from agent.tools import RESTAURANTS_FILE
 
-st.subheader("Chat History")
+    get_catalog(RESTAURANTS_FILE).name_index
+    get_extractor()
+    get_router()
+    return llm
 
 
-for msg in st.session_state.history:
-    if msg["role"] == "user":
-        st.markdown(f"**You:** {msg['content']}")
-    else:
-        st.markdown(f"**Agent:** {msg['content']}")
+llm = load_agent()
 
-st.write("---")
+if "history" not in st.session_state:
+    st.session_state.history = []
 
+if "booking" not in st.session_state:
+    st.session_state.booking = BookingState()
 
-user_input = st.text_input(
-    "Your message:",
-    key=f"chat_input_{st.session_state.input_key}",
-)
 
+st.title("🍽️ Restaurant Reservation AI Agent")
+st.write("Chat with the AI assistant to book a restaurant table.")
 
-if st.button("Send"):
-    if user_input.strip():
+history = st.session_state.history
+hidden = len(history) - MAX_VISIBLE_MESSAGES
+if hidden > 0:
+    st.caption(f"{hidden} earlier messages hidden")
 
-        st.session_state.history.append({"role": "user", "content": user_input})
+for msg in history[-MAX_VISIBLE_MESSAGES:]:
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
 
-        reply = agent_reply(user_input, st.session_state.history)
 
-        st.session_state.history.append({"role": "assistant", "content": reply})
+if user_input := st.chat_input("Your message"):
+    with st.chat_message("user"):
+        st.markdown(user_input)
 
-        st.session_state.input_key += 1
+    # The agent gets the history before this message; it adds the message itself.
+    with st.chat_message("assistant"):
+        reply = st.write_stream(llm.agent_reply_stream(user_input, history, st.session_state.booking))
 
-        st.rerun()
+    history.append({"role": "user", "content": user_input})
+    history.append({"role": "assistant", "content": reply})
+    del history[:-SESSION_HISTORY_LIMIT]
@@ -1,8 +1,10 @@
-from agent.llm import agent_reply
+from agent.booking import BookingState
+from agent.llm import agent_reply_stream
 
 def main():
     print("Restaurant AI Agent (type 'exit' to quit)\n")
     history = []
+    booking = BookingState()
 
     while True:
         user_input = input("You: ")
@@ -10,8 +12,12 @@ def main():
             print("Goodbye!")
             break
 
-        response = agent_reply(user_input, history)
-        print("Agent:", response)
+        print("Agent: ", end="", flush=True)
+        response = ""
+        for delta in agent_reply_stream(user_input, history, booking):
+            print(delta, end="", flush=True)
+            response += delta
+        print()
 
         history.append({"role": "user", "content": user_input})
         history.append({"role": "assistant", "content": response})
@@ -0,0 +1,215 @@
+"""Headless HTTP chat API (stdlib only).
+
+    python server.py --port 8000 --workers 16
+
+    POST   /chat               {"message": "...", "session_id": "..." (optional), "stream": false}
+    GET    /sessions/<id>      history and booking state
+    DELETE /sessions/<id>
+    GET    /healthz
+    GET    /metrics            Prometheus text (needs AGENT_TRACING=1)
+
+Requests are handled by a fixed worker pool and turns of one session are
+serialized by the session store's lock.
+
+Running several server processes (e.g. behind a load balancer) needs
+SESSION_BACKEND=sqlite and RESERVATION_BACKEND=sqlite: the SQLite reservation
+store checks capacity inside its write transaction, the session lock is a
+shared lease. The json and eventlog reservation backends only coordinate
+within one process and refuse to start while another process holds them.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from agent.booking import BookingState
+from agent.llm import agent_reply, agent_reply_stream
+from agent.sessions import SessionBusy, new_session_id, open_session_store
+from agent.tools import get_reservation_store
+from agent.tracing import metrics_text
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_MESSAGE_CHARS = 4000
+
+
+class ChatServer(HTTPServer):
+    """HTTPServer whose requests run on a bounded thread pool instead of a thread each."""
+
+    request_queue_size = 128
+    daemon_threads = True
+
+    def __init__(self, address, handler, sessions, workers):
+        super().__init__(address, handler)
+        self.sessions = sessions
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+
+    server_version = "RestaurantAgent/1.0"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send_json(status, {"error": message})
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._error(413, "Request body too large")
+            return None
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, UnicodeDecodeError):
+            self._error(400, "Body must be JSON")
+            return None
+        if not isinstance(payload, dict):
+            self._error(400, "Body must be a JSON object")
+            return None
+        return payload
+
+    def _session_id(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        return parts[1] if len(parts) == 2 and parts[0] == "sessions" and parts[1] else None
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/healthz":
+            self._send_json(200, {"ok": True})
+        elif path == "/metrics":
+            body = metrics_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self._session_id():
+            session = self.server.sessions.load(self._session_id())
+            if session is None:
+                self._error(404, "Unknown session")
+            else:
+                self._send_json(200, {"session_id": self._session_id(), **session})
+        else:
+            self._error(404, "Not found")
+
+    def do_DELETE(self):
+        session_id = self._session_id()
+        if session_id is None:
+            self._error(404, "Not found")
+        elif self.server.sessions.delete(session_id):
+            self._send_json(200, {"deleted": session_id})
+        else:
+            self._error(404, "Unknown session")
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/chat":
+            self._error(404, "Not found")
+            return
+        payload = self._read_json()
+        if payload is None:
+            return
+
+        message = payload.get("message")
+        if not isinstance(message, str) or not message.strip():
+            self._error(400, "'message' must be a non-empty string")
+            return
+        if len(message) > MAX_MESSAGE_CHARS:
+            self._error(413, f"'message' is longer than {MAX_MESSAGE_CHARS} characters")
+            return
+        session_id = payload.get("session_id") or new_session_id()
+        if not isinstance(session_id, str) or len(session_id) > 128:
+            self._error(400, "'session_id' must be a string")
+            return
+
+        sessions = self.server.sessions
+        try:
+            with sessions.lock(session_id):
+                session = sessions.load(session_id) or {"history": [], "state": {}}
+                history = session["history"]
+                state = BookingState.from_dict(session["state"])
+                stream = payload.get("stream")
+                if stream:
+                    reply = self._stream_reply(session_id, message, history, state)
+                else:
+                    reply = agent_reply(message, history, state)
+                history.append({"role": "user", "content": message})
+                history.append({"role": "assistant", "content": reply})
+                # Saved before answering, so the client's next turn always sees this one.
+                sessions.save(session_id, history, state.to_dict())
+        except SessionBusy:
+            self._error(409, "Another request for this session is still running")
+            return
+        if not stream:
+            self._send_json(200, {"session_id": session_id, "reply": reply})
+
+    def _stream_reply(self, session_id, message, history, state):
+        # Server-sent events; HTTP/1.0 closes the connection to end the stream.
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        reply = ""
+        try:
+            for delta in agent_reply_stream(message, history, state):
+                reply += delta
+                self.wfile.write(f"data: {json.dumps({'delta': delta})}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(f"event: done\ndata: {json.dumps({'session_id': session_id})}\n\n".encode())
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; keep what was produced so the session stays consistent.
+            pass
+        return reply
+
+    def log_message(self, format, *args):
+        if os.getenv("API_ACCESS_LOG", "0") == "1":
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=8000, workers=16, sessions=None):
+    # Open the reservation store now, so a second process on a single-process
+    # backend fails at startup instead of on its first booking.
+    get_reservation_store()
+    return ChatServer((host, port), ChatHandler, sessions or open_session_store(), workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restaurant agent HTTP chat API")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "16")))
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.workers)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# agent.llm builds its Groq client at import time; tests never send requests.
+os.environ.setdefault("GROQ_API_KEY", "test")
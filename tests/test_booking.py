@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+import pytest
+
+from agent.booking import BookingState, name_from_message
+
+
+def active_state(**slots):
+    state = BookingState()
+    state.start({"id": 1, "name": "Bella Italia"})
+    state.slots.update(slots)
+    return state
+
+
+@pytest.mark.parametrize("text, name", [
+    ("John Smith", "John Smith"),
+    ("My name is John Smith", "John Smith"),
+    ("i'm Priya Nair.", "Priya Nair"),
+    ("Name: Dr. A. Kumar", "Dr. A. Kumar"),
+    ("this is Will Turner", "Will Turner"),
+    ("what are your opening hours", None),
+    ("I am good", None),
+    ("is it open on sunday", None),
+])
+def test_name_from_message(text, name):
+    assert name_from_message(text) == name
+
+
+def test_name_with_lead_in_fills_the_slot():
+    state = active_state()
+    assert state.update_from_message("My name is John Smith") == ["user_name"]
+    assert state.slots["user_name"] == "John Smith"
+
+
+def test_question_is_not_taken_as_name():
+    state = active_state()
+    assert state.update_from_message("what are your opening hours") == []
+    assert "user_name" not in state.slots
+
+
+def test_weekday_replaces_the_previous_date():
+    state = active_state(date="01-01-2031")
+    state.update_from_message("Tuesday 8pm")
+
+    today = date.today()
+    tuesday = today + timedelta(days=(1 - today.weekday()) % 7)
+    assert state.slots["date"] == tuesday.strftime("%d-%m-%Y")
+    assert state.slots["time"] == "8:00 PM"
@@ -0,0 +1,60 @@
+import asyncio
+import sqlite3
+import threading
+
+from agent.cache import ResponseCache, is_cacheable
+from agent.history import summary_message
+
+
+def test_disk_entries_survive_a_new_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(ttl_seconds=60, disk_path=path)
+    cache.set("k", {"content": "hi"})
+    cache.flush()
+
+    fresh = ResponseCache(ttl_seconds=60, disk_path=path)
+    assert asyncio.run(fresh.aget("k")) == {"content": "hi"}
+    assert fresh.stats()["disk_hits"] == 1
+    assert asyncio.run(fresh.aget("missing")) is None
+
+
+def test_disk_io_runs_off_the_calling_thread(tmp_path):
+    cache = ResponseCache(ttl_seconds=60, disk_path=str(tmp_path / "cache.db"))
+    seen = []
+    original = cache._disk_get
+
+    def recording_get(key):
+        seen.append(threading.current_thread().name)
+        return original(key)
+
+    cache._disk_get = recording_get
+    asyncio.run(cache.aget("k"))
+    assert seen and all(name.startswith("llm-cache") for name in seen)
+
+
+def test_expired_rows_are_pruned_on_open_not_on_every_set(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(ttl_seconds=-1, disk_path=path)
+    cache.set("old", {"content": "stale"})
+    cache.flush()
+    cache.set("older", {"content": "stale"})
+    cache.flush()
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 2
+
+    ResponseCache(disk_path=path)
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 0
+
+
+def test_personal_data_in_any_message_is_not_cached():
+    assert is_cacheable([{"role": "user", "content": "show italian places"}])
+    assert not is_cacheable([{"role": "assistant", "content": "Phone: +91-9876543210"}])
+    assert not is_cacheable([summary_message({"user_name": "Asha Rao"})])
+
+
+def test_system_prompt_examples_do_not_block_caching():
+    from agent.prompts import build_system_prompt
+
+    assert is_cacheable([
+        {"role": "system", "content": build_system_prompt("booking")},
+        {"role": "user", "content": "show italian places"}
+    ])
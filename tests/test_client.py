@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+from agent.client import LLMClient
+
+
+class FakeStream:
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCompletions:
+    """Answers after `delays[model]` seconds; streams are FakeStream objects."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.streams = []
+        self.gate = None
+
+    async def create(self, model, stream=False, **kwargs):
+        await asyncio.sleep(self.delays[model])
+        if self.gate is not None:
+            await self.gate.wait()
+        if stream:
+            self.streams.append(FakeStream())
+            return self.streams[-1]
+        return SimpleNamespace(model=model)
+
+
+def make_client(delays):
+    client = LLMClient(api_key="test", hedge=True, hedge_min_samples=3, max_retries=0)
+    completions = FakeCompletions(delays)
+    client.api = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def test_hedge_windows_are_kept_per_model_and_stream():
+    client, _ = make_client({"small": 0.001, "large": 0.03})
+
+    async def warm_up():
+        for _ in range(3):
+            await client.create(model="small", stream=True)
+            await client.create(model="large")
+
+    asyncio.run(warm_up())
+    assert client.hedge_delay(("small", True)) < 0.01
+    assert client.hedge_delay(("large", False)) >= 0.03
+    # No samples yet for this combination, so no hedging either.
+    assert client.hedge_delay(("large", True)) is None
+    # A slow model is not hedged against a fast model's p95.
+    assert client.stats()["hedges"] == 0
+
+
+def test_losing_hedged_stream_is_closed():
+    client, completions = make_client({"m": 0.0})
+    client.hedge_delay = lambda key: 0.001
+
+    async def main():
+        # Both requests answer in the same loop iteration.
+        completions.gate = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.02, completions.gate.set)
+        return await client.create(model="m", stream=True)
+
+    winner = asyncio.run(main())
+    assert len(completions.streams) == 2
+    losers = [s for s in completions.streams if s is not winner]
+    assert [s.closed for s in losers] == [True]
+    assert not winner.closed
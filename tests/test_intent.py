@@ -0,0 +1,30 @@
+import pytest
+
+from agent.intent import prompt_intent
+from agent.tools_schema import tools_for_intent
+
+
+@pytest.mark.parametrize("text", [
+    "Please cancel my table reservation",
+    "cancel my table at Bella Italia for Friday",
+    "I need to change my table to 8pm",
+])
+def test_managing_a_table_gets_the_manage_tools(text):
+    assert prompt_intent(text) == "manage"
+    names = {tool["function"]["name"] for tool in tools_for_intent(prompt_intent(text))}
+    assert {"find_reservations", "cancel_reservation", "update_reservation"} <= names
+
+
+def test_manage_and_new_booking_together_get_every_tool():
+    assert prompt_intent("cancel that one and book another table") == "general"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("hello", "greeting"),
+    ("hi there!", "greeting"),
+    ("thank you so much", "greeting"),
+    ("hello italian", "search"),
+    ("hey, book a table at Bella Italia", "booking"),
+])
+def test_greeting_only_without_other_content(text, intent):
+    assert prompt_intent(text) == intent
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from agent.sessions import MemorySessionStore, SessionBusy
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_sessions=2)
+    store.save("a", [], {})
+    store.save("b", [], {})
+    store.load("a")
+    store.save("c", [], {})
+
+    assert store.load("b") is None
+    assert store.load("a") is not None and store.load("c") is not None
+
+
+def test_memory_store_forgets_idle_sessions():
+    store = MemorySessionStore(ttl=-1)
+    store.save("a", [{"role": "user", "content": "hi"}], {})
+
+    assert store.load("a") is None
+    assert not store._sessions
+
+
+def test_locks_are_dropped_once_released():
+    store = MemorySessionStore()
+    for i in range(100):
+        with store.lock(f"s{i}"):
+            pass
+
+    assert not store._locks
+
+
+def test_delete_keeps_the_lock_of_a_running_turn():
+    store = MemorySessionStore()
+    store.save("s", [], {})
+    held, done = threading.Event(), threading.Event()
+
+    def turn():
+        with store.lock("s"):
+            held.set()
+            done.wait(5)
+
+    worker = threading.Thread(target=turn)
+    worker.start()
+    held.wait(5)
+    assert store.delete("s")
+
+    # The running turn still excludes others after its session was deleted.
+    with pytest.raises(SessionBusy):
+        with store.lock("s", wait=0.05):
+            pass
+
+    done.set()
+    worker.join()
+    with store.lock("s", wait=0.05):
+        pass
+    assert not store._locks
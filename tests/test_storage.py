@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from agent.storage import EventLogReservationStore, JSONReservationStore, ReservationStore, SQLiteReservationStore
+
+LEGACY_ROWS = [
+    {"reservation_id": 1, "user_name": "Asha Rao", "restaurant_id": 1, "date": "25-12-2031",
+     "time": "7:30 PM", "guests": 2, "phone_number": "+91-9000000001"},
+    {"reservation_id": 2, "user_name": "Ben Cole", "restaurant_id": 1, "date": "<date>",
+     "time": "19:00", "guests": 2, "phone_number": "+91-9000000002"},
+    {"reservation_id": 3, "user_name": "Chen Li", "restaurant_id": 2, "date": "26-12-2031",
+     "time": "not specified", "guests": 4, "phone_number": "+91-9000000003"},
+]
+
+
+def booking(**fields):
+    row = {k: v for k, v in LEGACY_ROWS[0].items() if k != "reservation_id"}
+    return {**row, "date": "2031-12-25", "time": "19:30", "minute": 1170, **fields}
+
+
+def write_json(path, rows):
+    with open(path, "w") as f:
+        json.dump(rows, f)
+    return str(path)
+
+
+def open_backend(backend, tmp_path, rows):
+    json_path = write_json(tmp_path / "reservations.json", rows)
+    if backend == "json":
+        return JSONReservationStore(json_path)
+    if backend == "sqlite":
+        store = SQLiteReservationStore(str(tmp_path / "reservations.db"))
+    else:
+        store = EventLogReservationStore(str(tmp_path / "reservations.log.jsonl"))
+    store.migrate_from_json(json_path)
+    return store
+
+
+def test_sqlite_migration_keeps_rows_with_duplicate_legacy_ids(tmp_path):
+    rows = [
+        {**LEGACY_ROWS[0], "reservation_id": 1},
+        {**LEGACY_ROWS[0], "reservation_id": 1, "user_name": "Dev Shah", "phone_number": "+91-9000000004"},
+        {**LEGACY_ROWS[0], "reservation_id": 2, "user_name": "Esha Nair", "phone_number": "+91-9000000005"},
+    ]
+    json_path = write_json(tmp_path / "reservations.json", rows)
+    store = SQLiteReservationStore(str(tmp_path / "reservations.db"))
+
+    assert store.migrate_from_json(json_path) == 3
+    migrated = store.all()
+    assert sorted(r["user_name"] for r in migrated) == ["Asha Rao", "Dev Shah", "Esha Nair"]
+    assert len({r["reservation_id"] for r in migrated}) == 3
+    assert store.get(1)["user_name"] == "Asha Rao"
+
+    # Runs once per database, even if the JSON file is still there.
+    assert store.migrate_from_json(json_path) == 0
+    assert len(store.all()) == 3
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "eventlog", "json"])
+def test_normalize_records_rejects_unparseable_rows(tmp_path, backend):
+    store = open_backend(backend, tmp_path, LEGACY_ROWS)
+
+    assert store.normalize_records() == (1, 2)
+    remaining = store.all()
+    assert [r["reservation_id"] for r in remaining] == [1]
+    assert remaining[0]["date"] == "2031-12-25"
+    assert remaining[0]["time"] == "19:30"
+    assert remaining[0]["minute"] == 19 * 60 + 30
+
+
+def test_sqlite_rejected_rows_are_kept_with_reason(tmp_path):
+    store = open_backend("sqlite", tmp_path, LEGACY_ROWS)
+    store.normalize_records()
+
+    conn = sqlite3.connect(store.path)
+    rejected = dict(conn.execute("SELECT reservation_id, reason FROM reservations_rejected").fetchall())
+    conn.close()
+    assert set(rejected) == {2, 3}
+    assert "date" in rejected[2] and "time" in rejected[3]
+    assert store.normalize_records() == (0, 0)
+
+
+def test_json_rejected_rows_go_to_side_file(tmp_path):
+    store = open_backend("json", tmp_path, LEGACY_ROWS)
+    store.normalize_records()
+
+    with open(store.path + ".rejected.json") as f:
+        rejected = json.load(f)
+    assert [r["reservation_id"] for r in rejected] == [2, 3]
+    assert all(r["rejected_reason"] for r in rejected)
+
+
+def test_eventlog_rejections_survive_replay(tmp_path):
+    store = open_backend("eventlog", tmp_path, LEGACY_ROWS)
+    store.normalize_records()
+    store._log.close()
+
+    reopened = EventLogReservationStore(store.log_path)
+    assert [r["reservation_id"] for r in reopened.all()] == [1]
+    assert reopened.all()[0]["date"] == "2031-12-25"
+
+
+def test_eventlog_replay_drops_torn_last_line(tmp_path):
+    log_path = str(tmp_path / "reservations.log.jsonl")
+    store = EventLogReservationStore(log_path)
+    store.add(booking())
+    store.add(booking(time="20:00", minute=1200))
+    store._log.close()
+    intact_size = os.path.getsize(log_path)
+
+    # A crash in the middle of appending the third event.
+    with open(log_path, "a") as f:
+        f.write('{"seq":3,"type":"create","reservation_id":3,"data":{"user_na')
+
+    reopened = EventLogReservationStore(log_path)
+    assert [(r["reservation_id"], r["time"]) for r in reopened.all()] == [(1, "19:30"), (2, "20:00")]
+    assert os.path.getsize(log_path) == intact_size
+
+    # Appends continue on a clean line and survive the next replay.
+    third = reopened.add(booking(date="2031-12-26"))
+    assert third["reservation_id"] == 3
+    reopened._log.close()
+    assert len(EventLogReservationStore(log_path).all()) == 3
+
+
+def test_backend_missing_a_method_cannot_be_created():
+    class Partial(ReservationStore):
+        def add(self, reservation):
+            return reservation
+
+    with pytest.raises(TypeError, match="book"):
+        Partial()
@@ -0,0 +1,49 @@
+import pytest
+
+from agent.llm import StreamingOutputFilter
+
+
+def run(chunks):
+    output_filter = StreamingOutputFilter()
+    text = "".join(output_filter.feed(chunk) for chunk in chunks) + output_filter.flush()
+    return text, output_filter.dropped
+
+
+def split_every(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 1000])
+@pytest.mark.parametrize("leaked", [
+    'search_restaurants{"cuisine": "Italian"}',
+    'find_restaurant_by_name{"restaurant_name": "Bella Italia"}',
+    'check_availability {"restaurant_id": 2, "time": "{7pm}"}',
+    '<function=search_restaurants>{"cuisine": "Thai"}</function>',
+])
+def test_leaked_call_is_dropped_wherever_chunks_split_it(leaked, size):
+    text, dropped = run(split_every(f"Sure! {leaked} Here you go.", size))
+    assert text == "Sure!  Here you go."
+    assert dropped
+
+
+@pytest.mark.parametrize("size", [1, 4, 1000])
+def test_ordinary_text_passes_through(size):
+    message = "Hello there, my_friend! Table for 4 at 7:30 {maybe}?"
+    text, dropped = run(split_every(message, size))
+    assert text == message
+    assert not dropped
+
+
+def test_unterminated_call_at_end_is_dropped():
+    text, dropped = run(["Let me check. ", "search_restaur", 'ants{"cuisine": "Ital'])
+    assert text == "Let me check. "
+    assert dropped
+
+
+def test_trailing_word_is_held_until_the_next_chunk():
+    output_filter = StreamingOutputFilter()
+    assert output_filter.feed("Looking up search") == "Looking up "
+    assert output_filter.feed("_restaurants") == ""
+    assert output_filter.feed(" now") == "search_restaurants "
+    assert output_filter.feed(" is") == "now "
+    assert output_filter.flush() == "is"